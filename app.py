@@ -2,6 +2,7 @@
 # PIAS v1.4.2‑fix‑push — Políticas de mínimos seleccionables:
 # 1) "Solo en un mes" (estricto por mes, sin arrastre, PUSH del mes)
 # 2) "Continuo" (activable desde su mes, con arrastre)
+# 3) "Óptimo" (reglas de "Continuo", resuelto por programación lineal por código: piat.optimo)
 #
 # FIX v1.4.2‑fix (preservado):
 # - Horizonte de meses = unión (meses en Stock ∪ meses en Mínimos > 0).
@@ -14,13 +15,30 @@
 #   * Código CON mínimos → en su ÚLTIMO mes con mínimos y con 0 pendientes, PUSH del remanente de ese mes (carry -> 0).
 #   * Fallback de seguridad al final por si quedara carry residual.
 # =========================================================
-import streamlit as st
-import pandas as pd
-import numpy as np
+import hashlib
 import io
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import defaultdict
+import time
+
+import streamlit as st
+
+from piat import (
+    EXTENSION_SALIDA,
+    MIME_SALIDA,
+    POLITICAS,
+    POLITICA_CONTINUO,
+    POLITICA_OPTIMO,
+    AlmacenDelta,
+    EstadoContinuo,
+    cargar_entradas,
+    ejecutar_asignacion,
+    ejecutar_asignacion_delta,
+    ejecutar_continuo_rodante,
+    exportar_salida,
+)
+from piat.diagnostico import Diagnostico
+from piat.graficos import figuras
+from piat.optimo import comparar_cumplimiento, resumen_optimizacion
+from piat.trabajos import ESTADO_CANCELADO, ESTADO_ERROR, GestorTrabajos
 
 # =========================
 # 1) Cabecera de la App
@@ -41,69 +59,116 @@ st.markdown("""
 uploaded_file = st.file_uploader("Sube tu archivo Excel", type=["xlsx"])
 
 # =========================
-# 2) Helpers
+# 2) Caché entre reruns
+# Clave = hash del contenido del archivo (+ política). Cada interacción con un widget
+# re-ejecuta el script: con el caché, re-renderizar, alternar políticas o volver a
+# descargar no relee el Excel ni recalcula. Tamaño acotado (max_entries) y TTL para
+# no crecer sin límite en un servidor compartido.
 # =========================
-def norm_cliente(x):
-    return x.strip() if isinstance(x, str) else x
+CACHE_TTL_SEG = 60 * 60
+CACHE_MAX_ARCHIVOS = 4
+CACHE_MAX_RESULTADOS = 8
+CACHE_MAX_DESCARGAS = 4
+
+# Formatos de descarga ofrecidos en la app (el Excel se escribe en modo streaming)
+FORMATOS_DESCARGA = {
+    "xlsx_stream": "Excel (.xlsx)",
+    "zip_parquet": "ZIP con tablas Parquet",
+    "zip_csv": "ZIP con tablas CSV",
+}
+
+
+# Cada función cacheada devuelve también el Diagnostico (piat.diagnostico) de la corrida que
+# generó el valor: en los reruns el panel de diagnóstico muestra esos tiempos originales.
+@st.cache_resource(max_entries=CACHE_MAX_ARCHIVOS, ttl=CACHE_TTL_SEG, show_spinner="Leyendo archivo...")
+def cargar_entradas_cache(hash_archivo: str, _contenido: bytes):
+    diagnostico = Diagnostico()
+    return cargar_entradas(io.BytesIO(_contenido), diagnostico), diagnostico
+
+
+@st.cache_resource(max_entries=CACHE_MAX_DESCARGAS, ttl=CACHE_TTL_SEG, show_spinner="Preparando descarga...")
+def exportar_salida_cache(id_trabajo: str, formato: str, incluir_entradas: bool, _resultado, _entradas):
+    """Bytes del archivo de salida (una sola copia, reutilizada en cada descarga)."""
+    diagnostico = Diagnostico()
+    with diagnostico.etapa(f"7) Exportación ({formato})") as registro:
+        datos = exportar_salida(_resultado, _entradas, formato, incluir_entradas=incluir_entradas)
+        registro["bytes"] = len(datos)
+    return datos, diagnostico
 
-def _safe_int(x, default=0):
-    try:
-        return int(x)
-    except Exception:
-        try:
-            return int(float(x))
-        except Exception:
-            return default
 
 # =========================
-# 3) Proceso principal
+# 2.1) Trabajos en segundo plano (piat.trabajos)
+# La asignación corre en un hilo del gestor, no en el del script: la página muestra el avance
+# (sondeo cada SONDEO_SEG), se puede cancelar y, como el gestor es único en el servidor y el id
+# del trabajo queda en la URL (?trabajo=<id>), al recargar la página se vuelve al resultado.
+# La clave (archivo, política, opciones) reutiliza un trabajo igual en curso o terminado.
 # =========================
-if uploaded_file:
-    try:
-        # --- 3.1 Carga de hojas ---
-        df_stock = pd.read_excel(uploaded_file, sheet_name="Stock Disponible")
-        df_prior = pd.read_excel(uploaded_file, sheet_name="Prioridad Clientes", index_col=0)
-        df_min   = pd.read_excel(uploaded_file, sheet_name="Mínimos de Asignación", index_col=[0, 1, 2])
-
-        # --- 3.2 Limpieza mínima ---
-        df_stock.columns = [c.strip() for c in df_stock.columns]
-        requeridas_stock = {"MES", "Codigo", "Stock Disponible"}
-        if not requeridas_stock.issubset(df_stock.columns):
-            faltan = requeridas_stock - set(df_stock.columns)
-            raise ValueError(f"La hoja 'Stock Disponible' debe contener las columnas: {', '.join(requeridas_stock)}. Faltan: {', '.join(faltan)}")
-
-        # Stock
-        df_stock["Codigo"] = df_stock["Codigo"].astype(str).str.strip()
-        df_stock["MES"] = pd.to_numeric(df_stock["MES"], errors="coerce").fillna(1).astype(int)
-        df_stock["Stock Disponible"] = pd.to_numeric(df_stock["Stock Disponible"], errors="coerce").fillna(0)
-        df_stock = df_stock[df_stock["Stock Disponible"] > 0].copy()
-
-        # Prioridades
-        if df_prior.shape[1] < 1:
-            raise ValueError("La hoja 'Prioridad Clientes' debe tener al menos una columna con el valor de prioridad.")
-        prioridad_series = pd.to_numeric(df_prior.iloc[:, 0], errors="coerce").fillna(5).astype(int)
-        prioridad_series.index = prioridad_series.index.map(lambda x: str(norm_cliente(x)))
-        clientes_por_prioridad = prioridad_series.sort_values().index.tolist()
-
-        # --- 3.3 Mínimos → conservar MES original y consolidar ---
-        df_min = df_min.reset_index()
-        df_min.columns = ["MES", "Codigo", "Cliente", "Minimo"]
-        if "Minimo" not in df_min.columns:
-            raise ValueError("La hoja 'Mínimos de Asignación' debe incluir la columna 'Minimo'.")
-        df_min["MES"] = pd.to_numeric(df_min["MES"], errors="coerce").fillna(1).astype(int)
-        df_min["Codigo"] = df_min["Codigo"].astype(str).str.strip()
-        df_min["Cliente"] = df_min["Cliente"].map(lambda x: str(norm_cliente(x)))
-        df_min["Minimo"] = pd.to_numeric(df_min["Minimo"], errors="coerce").fillna(0).astype(int)
-        df_min = (
-            df_min.groupby(["MES", "Codigo", "Cliente"], as_index=True)["Minimo"]
-            .sum()
-            .to_frame()
+TRABAJOS_HILOS = 2
+SONDEO_SEG = 1.0
+
+
+@st.cache_resource
+def gestor_trabajos():
+    return GestorTrabajos(hilos=TRABAJOS_HILOS, max_terminados=CACHE_MAX_RESULTADOS, ttl_seg=CACHE_TTL_SEG)
+
+
+def correr_asignacion(
+    entradas, modo, clave_delta=None, rodante=False, estado_bytes=None, mes_cierre=None, clave_estado=None, progreso=None
+):
+    """
+    Cuerpo de un trabajo: delta (piat.delta) con clave_delta, horizonte móvil (piat.cierre) con rodante
+    (el estado debe ser del template clave_estado).
+    Con "Óptimo" corre también "Continuo" para la tabla de cumplimiento comparado (en el trabajo, no en el script).
+    Devuelve (resultado, bytes del estado de cierre nuevo o None, diagnóstico, comparación o None).
+    """
+    diagnostico = Diagnostico()
+    estado_nuevo = None
+    if rodante:
+        estado = EstadoContinuo.cargar(estado_bytes) if estado_bytes is not None else None
+        resultado, estado_nuevo = ejecutar_continuo_rodante(
+            entradas, estado, mes_cierre, diagnostico=diagnostico, progreso=progreso, clave=clave_estado
+        )
+    elif clave_delta is not None:
+        resultado = ejecutar_asignacion_delta(
+            entradas, modo, AlmacenDelta(clave=clave_delta), diagnostico=diagnostico, progreso=progreso
         )
+    else:
+        resultado = ejecutar_asignacion(entradas, modo, diagnostico=diagnostico, progreso=progreso)
+    comparacion = None
+    if modo == POLITICA_OPTIMO:
+        with diagnostico.etapa(f"6.5) Comparación con {POLITICA_CONTINUO}") as registro:
+            continuo = ejecutar_asignacion(entradas, POLITICA_CONTINUO, progreso=progreso)
+            comparacion = comparar_cumplimiento({POLITICA_CONTINUO: continuo, POLITICA_OPTIMO: resultado})
+            registro["filas"] = len(comparacion)
+    return resultado, (estado_nuevo.a_bytes() if estado_nuevo is not None else None), diagnostico, comparacion
+
+
+def texto_progreso(progreso) -> str:
+    partes = [progreso.etapa or "En cola"]
+    if progreso.meses_total:
+        partes.append(f"meses {progreso.meses_hechos}/{progreso.meses_total}")
+    if progreso.codigos_total:
+        partes.append(f"códigos {progreso.codigos_hechos:,}/{progreso.codigos_total:,}")
+    elif progreso.codigos_hechos:
+        partes.append(f"códigos procesados {progreso.codigos_hechos:,}")
+    return " — ".join(partes)
+
+
+gestor = gestor_trabajos()
+hash_archivo = None
 
-        # --- 3.4 Intersección de códigos válidos ---
-        cod_min = set(df_min.index.get_level_values(1))
-        cod_stk = set(df_stock["Codigo"])
-        cod_validos = sorted(cod_min & cod_stk)
+# =========================
+# 3) Proceso principal (la lógica vive en el paquete `piat`)
+# =========================
+if uploaded_file:
+    try:
+        # --- 3.1-3.4 Carga, limpieza y consolidación ---
+        contenido = uploaded_file.getvalue()
+        hash_archivo = hashlib.sha256(contenido).hexdigest()
+        entradas, diag_carga = cargar_entradas_cache(hash_archivo, contenido)
+        df_stock = entradas.df_stock
+        df_prior = entradas.df_prior
+        df_min = entradas.df_min
 
         # --- 3.5 Resumen de entrada ---
         st.subheader("📊 Resumen del archivo cargado")
@@ -116,293 +181,208 @@ if uploaded_file:
         with st.form("run_asignacion"):
             modo = st.radio(
                 "Política de mínimos",
-                options=["Solo en un mes", "Continuo"],
-                index=1,  # por defecto: Continuo
+                options=list(POLITICAS),
+                index=POLITICAS.index(POLITICA_CONTINUO),  # por defecto: Continuo
                 horizontal=True,
                 help=(
                     "Solo en un mes: cada mínimo solo se cumple en el MES indicado; el stock no se arrastra y el PUSH es del mismo mes. "
                     "Continuo: el mínimo se activa en su MES y puede cumplirse en meses posteriores; el stock se arrastra. "
+                    "Óptimo: mismas reglas que Continuo, resuelto por programación lineal por código "
+                    "(maximiza el cumplimiento ponderado por prioridad en todo el horizonte). "
                     "El PUSH se registra cuando el código termina."
                 ),
             )
+            usar_delta = st.checkbox(
+                "♻️ Recalcular solo los códigos modificados desde la corrida anterior",
+                value=False,
+                help=(
+                    "Compara el archivo con la última corrida guardada con la misma clave y política: "
+                    "se recalculan solo los códigos cuyo stock o mínimos cambiaron (todos si cambia la "
+                    "hoja Prioridad Clientes o el horizonte de meses). El resultado es el mismo que una corrida completa."
+                ),
+            )
+            clave_template = st.text_input(
+                "Clave del template (p. ej. CH, MX o AR)",
+                value="principal",
+                help="Identifica la corrida anterior para el recálculo delta y el estado de cierre del horizonte móvil.",
+            )
+            with st.expander("🗓️ Horizonte móvil (solo Continuo)"):
+                estado_subido = st.file_uploader(
+                    "Estado de cierre de la corrida anterior (.zip)",
+                    type=["zip"],
+                    help="Se conservan tal cual los meses cerrados y se procesan solo los meses posteriores al cierre.",
+                )
+                mes_cierre = st.number_input(
+                    "Cerrar en el mes (0 = sin cierre)",
+                    min_value=0,
+                    value=0,
+                    step=1,
+                    help="Guarda el estado al terminar ese mes (carry y cuotas asignadas) para retomarlo en la próxima corrida.",
+                )
             ejecutar = st.form_submit_button("🔁 Ejecutar Asignación (según política elegida)")
 
+        # El trabajo se identifica en la URL: la corrida sigue visible en los reruns y al recargar la página
         if ejecutar:
-            # =========================
-            # 4) Preparaciones comunes
-            # =========================
-            df_min_pos = df_min[df_min["Minimo"] > 0].copy()
-            df_min_pos = df_min_pos[df_min_pos.index.get_level_values(1).isin(cod_validos)]
-
-            # Meses a procesar = unión (stock ∪ mínimos>0)
-            meses_stock = set(df_stock["MES"].unique())
-            meses_min   = set(df_min_pos.reset_index()["MES"].unique()) if df_min_pos.shape[0] > 0 else set()
-            meses = sorted(meses_stock | meses_min)
-            mes_final = max(meses) if len(meses) else 1
-
-            # Clientes presentes en mínimos, ordenados por prioridad
-            clientes_en_min = sorted(
-                {cli for (_, _, cli) in df_min_pos.index},
-                key=lambda x: prioridad_series.get(x, 999)
-            )
-
-            # Columnas de salida (clientes + PUSH)
-            columnas_asig = (
-                [c for c in clientes_por_prioridad if c in clientes_en_min] +
-                [c for c in clientes_en_min if c not in clientes_por_prioridad] +
-                ["PUSH"]
+            estado_bytes = estado_subido.getvalue() if estado_subido is not None else None
+            rodante = None
+            if estado_bytes is not None or mes_cierre:
+                if modo == POLITICA_CONTINUO:
+                    rodante = (hashlib.sha256(estado_bytes).hexdigest() if estado_bytes else None, int(mes_cierre) or None)
+                else:
+                    st.warning("El horizonte móvil solo aplica a la política Continuo: se ejecuta la corrida completa.")
+            clave_delta = clave_template if usar_delta and rodante is None else None
+            trabajo = gestor.enviar(
+                correr_asignacion,
+                entradas,
+                modo,
+                clave_delta=clave_delta,
+                rodante=rodante is not None,
+                estado_bytes=estado_bytes,
+                mes_cierre=rodante[1] if rodante is not None else None,
+                clave_estado=clave_template,
+                clave=(hash_archivo, modo, clave_delta, rodante, clave_template if rodante is not None else None),
+                descripcion=f"{uploaded_file.name} — {modo}",
+                datos={
+                    "archivo": uploaded_file.name,
+                    "hash": hash_archivo,
+                    "modo": modo,
+                    "rodante": rodante,
+                    "entradas": entradas,
+                    "diag_carga": diag_carga,
+                },
             )
+            st.query_params["trabajo"] = trabajo.id
 
-            # Estructuras de cuotas
-            cuotas = {idx: _safe_int(q) for idx, q in df_min_pos["Minimo"].items()}
-            asignado_cuota = {idx: 0 for idx in cuotas.keys()}
-
-            # Índice FIFO por (Codigo, Cliente)
-            cuotas_por_cod_cli = defaultdict(list)
-            for (mes_obj, cod, cli), qty in cuotas.items():
-                cuotas_por_cod_cli[(cod, cli)].append((mes_obj, qty, (mes_obj, cod, cli)))
-            for k in cuotas_por_cod_cli:
-                cuotas_por_cod_cli[k].sort(key=lambda t: t[0])  # FIFO por MES_obj
-
-            # ======= Estructuras para "PUSH por término de código" =======
-            last_mes_por_codigo = (
-                df_min_pos.reset_index().groupby("Codigo")["MES"].max().to_dict()
-            ) if df_min_pos.shape[0] > 0 else {}
-
-            def pendientes_codigo(codigo: str) -> int:
-                """Total pendiente en TODAS las cuotas del código."""
-                total = 0
-                for (mes_obj, cod, cli), qty in cuotas.items():
-                    if cod != codigo:
-                        continue
-                    total += max(0, qty - asignado_cuota[(mes_obj, cod, cli)])
-                return int(total)
-            # =============================================================
-
-            filas_salida = []  # builder de "Asignación Óptima"
+    except Exception as e:
+        st.error(f"❌ Error al procesar el archivo: {e}")
 
-            # =========================
-            # 5) Motores de asignación
-            # =========================
-            def asignar_solo_en_su_mes():
-                """Mínimos exigibles solo en su MES exacto. Stock no se arrastra. Sobrantes -> PUSH del mes."""
-                for mes in meses:
-                    stock_mes = (
-                        df_stock[df_stock["MES"] == mes]
-                        .groupby("Codigo")["Stock Disponible"].sum()
-                    )
-                    for codigo, stock_disp in stock_mes.items():
-                        stock_disp = _safe_int(stock_disp)
-                        asign_x_cliente = {c: 0 for c in columnas_asig}
-                        if stock_disp <= 0:
-                            filas_salida.append({"MES": mes, "Codigo": codigo, **{c: 0.0 for c in columnas_asig}})
-                            continue
-                        for cliente in columnas_asig:
-                            if cliente == "PUSH" or stock_disp <= 0:
-                                continue
-                            lst = cuotas_por_cod_cli.get((codigo, cliente), [])
-                            for (mes_obj, qty, idx_key) in lst:
-                                if mes_obj != mes:
-                                    continue
-                                pendiente = qty - asignado_cuota[idx_key]
-                                if pendiente <= 0 or stock_disp <= 0:
-                                    continue
-                                asign = min(pendiente, stock_disp)
-                                asignado_cuota[idx_key] += asign
-                                stock_disp -= asign
-                                asign_x_cliente[cliente] += asign
-                                if stock_disp <= 0:
-                                    break
-                        if stock_disp > 0:
-                            asign_x_cliente["PUSH"] += float(stock_disp)
-                        filas_salida.append({"MES": mes, "Codigo": codigo, **asign_x_cliente})
-
-            def asignar_continuo():
-                """
-                Mínimos activables desde su MES y consumibles hacia adelante. Stock se arrastra (carry).
-                MEJORA: el PUSH se registra en el mes donde el CÓDIGO termina de asignar.
-                  - Código SIN mínimos → PUSH mensual (todo lo disponible del mes + carry).
-                  - Código CON mínimos → en su último mes y con 0 pendientes, remanente a PUSH del mes.
-                """
-                carry_stock = {}  # stock arrastrable por código
-                codigos_con_min = set(df_min_pos.index.get_level_values(1)) if df_min_pos.shape[0] > 0 else set()
-
-                for mes in meses:
-                    stock_mes = (
-                        df_stock[df_stock["MES"] == mes]
-                        .groupby("Codigo")["Stock Disponible"].sum()
-                    )
-                    # acumular llegadas
-                    for codigo, inc in stock_mes.items():
-                        carry_stock[codigo] = carry_stock.get(codigo, 0) + _safe_int(inc)
-
-                    # procesar códigos con carry o llegadas (UNIÓN)
-                    codigos_trabajo = set(carry_stock.keys()) | set(stock_mes.index)
-
-                    for codigo in sorted(codigos_trabajo):
-                        asign_x_cliente = {c: 0 for c in columnas_asig}
-
-                        # repartir a cuotas activas (MES_obj <= mes)
-                        if carry_stock.get(codigo, 0) > 0:
-                            for cliente in columnas_asig:
-                                if cliente == "PUSH":
-                                    continue
-                                if carry_stock[codigo] <= 0:
-                                    break
-                                lst = cuotas_por_cod_cli.get((codigo, cliente), [])
-                                if not lst:
-                                    continue
-                                for (mes_obj, qty, idx_key) in lst:
-                                    if mes_obj > mes:
-                                        break  # aún no activada
-                                    pendiente = qty - asignado_cuota[idx_key]
-                                    if pendiente <= 0:
-                                        continue
-                                    if carry_stock[codigo] <= 0:
-                                        break
-                                    asign = min(pendiente, carry_stock[codigo])
-                                    asignado_cuota[idx_key] += asign
-                                    carry_stock[codigo] -= asign
-                                    asign_x_cliente[cliente] += asign
-                                    if carry_stock[codigo] <= 0:
-                                        break
-
-                        # --- DECISIÓN DE PUSH DEL MES (MEJORA) ---
-                        tiene_min = codigo in codigos_con_min
-                        if not tiene_min:
-                            # sin mínimos → PUSH mensual
-                            if carry_stock.get(codigo, 0) > 0:
-                                asign_x_cliente["PUSH"] += float(carry_stock[codigo])
-                                carry_stock[codigo] = 0
-                        else:
-                            # con mínimos → último mes y 0 pendientes
-                            last_mes = last_mes_por_codigo.get(codigo, None)
-                            if last_mes is not None and mes >= int(last_mes):
-                                if carry_stock.get(codigo, 0) > 0 and pendientes_codigo(codigo) == 0:
-                                    asign_x_cliente["PUSH"] += float(carry_stock[codigo])
-                                    carry_stock[codigo] = 0
-
-                        # registrar fila si hubo asignación o recepción de stock
-                        if any(asign_x_cliente[c] > 0 for c in columnas_asig) or (codigo in stock_mes.index):
-                            filas_salida.append({"MES": mes, "Codigo": codigo, **asign_x_cliente})
-
-                    # limpieza opcional de carry
-                    for codigo in list(carry_stock.keys()):
-                        if carry_stock[codigo] <= 0 and codigo not in stock_mes.index:
-                            del carry_stock[codigo]
-
-                # Fallback de seguridad
-                for codigo, rem in carry_stock.items():
-                    rem = _safe_int(rem)
-                    if rem > 0:
-                        filas_salida.append({"MES": mes_final, "Codigo": codigo, **{c: 0.0 for c in columnas_asig}, "PUSH": float(rem)})
-
-            # --- Ejecutar el motor elegido ---
-            if modo == "Solo en un mes":
-                asignar_solo_en_su_mes()
-            else:
-                asignar_continuo()
 
+# =========================
+# 4-10) Trabajo: avance, cancelación y resultado (también al volver con ?trabajo=<id>)
+# =========================
+id_trabajo = st.query_params.get("trabajo")
+trabajo = gestor.obtener(id_trabajo) if id_trabajo else None
+if id_trabajo and trabajo is None:
+    st.warning(
+        "⚠️ La corrida anterior ya no está disponible (venció o se reinició el servidor). "
+        "Sube el archivo y vuelve a ejecutar la asignación."
+    )
+elif trabajo is not None and hash_archivo in (None, trabajo.datos["hash"]):
+    try:
+        datos = trabajo.datos
+        modo, rodante, entradas = datos["modo"], datos["rodante"], datos["entradas"]
+        st.caption(
+            f"Trabajo `{trabajo.id}` — {trabajo.descripcion}. Puedes recargar o cerrar la página: "
+            "con este enlace vuelves al avance y al resultado."
+        )
+        if not trabajo.terminado:
+            # Sondeo: mostrar el avance y volver a ejecutar el script hasta que el trabajo termine
+            st.info(f"⏳ Asignación {trabajo.estado} ({trabajo.segundos():.0f} s)")
+            st.progress(trabajo.progreso.fraccion() or 0.0, text=texto_progreso(trabajo.progreso))
+            if st.button("⏹️ Cancelar asignación"):
+                gestor.cancelar(trabajo.id)
+            time.sleep(SONDEO_SEG)
+            st.rerun()
+        elif trabajo.estado == ESTADO_CANCELADO:
+            st.warning(f"⏹️ Asignación cancelada ({texto_progreso(trabajo.progreso)}).")
+        elif trabajo.estado == ESTADO_ERROR:
+            st.error(f"❌ Error al procesar el archivo: {trabajo.error}")
+        else:
             # =========================
-            # 6) Armar DataFrame de salida y métricas
+            # 4-6) Motor y métricas (piat.motor / piat.delta / piat.cierre, en el trabajo)
             # =========================
-            if len(filas_salida) == 0:
-                df_asig = pd.DataFrame(columns=["MES", "Codigo"] + columnas_asig)
-                df_asig_idx = df_asig.set_index(["MES", "Codigo"])
-            else:
-                df_asig = pd.DataFrame(filas_salida)
-                for c in columnas_asig:
-                    if c not in df_asig.columns:
-                        df_asig[c] = 0.0
-                df_asig = df_asig.fillna(0)
-                df_asig_idx = (
-                    df_asig.groupby(["MES", "Codigo"], as_index=True)[columnas_asig]
-                    .sum()
-                    .sort_index()
+            resultado, estado_nuevo_bytes, diag_motor, comparacion = trabajo.resultado
+            df_asig_idx = resultado.df_asig_idx
+            df_min_metrics = resultado.df_min_metrics
+
+            st.success(f"✅ Asignación completada — Política: {modo} ({trabajo.segundos():.1f} s)")
+            if resultado.delta is not None:
+                info = resultado.delta
+                st.info(
+                    f"♻️ Re-ejecución delta ({info['motivo']}): {info['reutilizados']:,} de {info['codigos']:,} códigos "
+                    f"reutilizados de la corrida anterior, {info['recalculados']:,} recalculados."
                 )
-            df_asig_idx = df_asig_idx.reindex(columns=columnas_asig).fillna(0)
-
-            # Métricas por fila del template
-            df_min_metrics = df_min_pos.copy()
-            df_min_metrics["Asignado"] = df_min_metrics.index.map(lambda idx: _safe_int(asignado_cuota.get(idx, 0)))
-            df_min_metrics["Cumple"] = df_min_metrics["Asignado"] >= df_min_metrics["Minimo"]
-            df_min_metrics["Pendiente Final"] = (df_min_metrics["Minimo"] - df_min_metrics["Asignado"]).clip(lower=0)
-
-            # =========================
-            # 7) Excel de salida (mismas hojas)
-            # =========================
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine="openpyxl") as writer:
-                df_asig_out = df_asig_idx.reset_index()
-                df_asig_out.to_excel(writer, sheet_name="Asignación Óptima", index=False)
-                df_stock.to_excel(writer, sheet_name="Stock Disponible", index=False)
-                df_prior.to_excel(writer, sheet_name="Prioridad Clientes")
-                df_min_export = df_min_metrics.reset_index().rename(
-                    columns={"level_0": "MES", "level_1": "Codigo", "level_2": "Cliente"}
+            if rodante is not None:
+                st.info(
+                    f"🗓️ Horizonte móvil: {resultado.contadores['meses_cerrados']:,} meses cerrados conservados, "
+                    f"{resultado.contadores['meses_procesados']:,} meses procesados."
                 )
-                df_min_export.to_excel(writer, sheet_name="Mínimos de Asignación", index=False)
-            output.seek(0)
+                if estado_nuevo_bytes is not None:
+                    st.download_button(
+                        label=f"💾 Descargar estado de cierre (mes {rodante[1]})",
+                        data=estado_nuevo_bytes,
+                        file_name=f"estado_cierre_PIAT_mes_{rodante[1]}.zip",
+                        mime="application/zip",
+                    )
 
-            st.success(f"✅ Asignación completada — Política: {modo}")
+            if resultado.optimizacion is not None:
+                with st.expander("🧮 Detalle de optimización (vs. Continuo)"):
+                    resumen = resumen_optimizacion(resultado.optimizacion)
+                    st.write(
+                        f"- **Códigos con mínimos**: {resumen['codigos']:,} "
+                        f"({', '.join(f'{k}: {v:,}' for k, v in resumen['por_estado'].items())})"
+                    )
+                    st.write(f"- **Tiempo de solver**: {resumen['tiempo_solver_s']:.2f} s — **gap máximo**: {resumen['gap_max']:.2e}")
+                    st.dataframe(comparacion)
 
             # =========================
-            # 8) Gráficos
+            # 8) Gráficos (piat.graficos)
             # =========================
+            diag_graficos = Diagnostico()
+            with diag_graficos.etapa("8) Gráficos"):
+                fig1, fig2, fig3 = figuras(df_asig_idx)
             st.subheader("📊 Total asignado por cliente")
-            if "PUSH" in df_asig_idx.columns:
-                df_asig_long = df_asig_idx.drop(columns=["PUSH"]).stack().reset_index()
-            else:
-                df_asig_long = df_asig_idx.stack().reset_index()
-            df_asig_long.columns = ["MES", "Codigo", "Cliente", "Asignado"]
-            fig1, ax1 = plt.subplots(figsize=(10, 4))
-            res_plot = df_asig_long.groupby("Cliente")["Asignado"].sum().sort_values(ascending=False)
-            if len(res_plot) > 0:
-                sns.barplot(x=res_plot.index, y=res_plot.values, ax=ax1)
-                ax1.set_title("Total Asignado por Cliente")
-                ax1.set_ylabel("Unidades")
-                ax1.set_xlabel("Cliente")
-                ax1.tick_params(axis="x", rotation=45)
+            if fig1 is not None:
                 st.pyplot(fig1)
 
             st.subheader("📈 Asignación por mes (suma de clientes)")
-            if "PUSH" in df_asig_idx.columns:
-                df_mes = (
-                    df_asig_idx.drop(columns=["PUSH"]).sum(axis=1).reset_index()
-                    .groupby("MES")[0].sum().reset_index()
-                )
-            else:
-                df_mes = (
-                    df_asig_idx.sum(axis=1).reset_index()
-                    .groupby("MES")[0].sum().reset_index()
-                )
-            df_mes.columns = ["MES", "Asignado"]
-            fig2, ax2 = plt.subplots(figsize=(8, 4))
-            if df_mes.shape[0] > 0:
-                sns.barplot(data=df_mes, x="MES", y="Asignado", ax=ax2)
-                ax2.set_title("Total Asignado por Mes")
+            if fig2 is not None:
                 st.pyplot(fig2)
 
             st.subheader("📦 PUSH por mes")
-            if "PUSH" in df_asig_idx.columns:
-                df_push = df_asig_idx["PUSH"].groupby(level=0).sum().reset_index()
-                df_push.columns = ["MES", "PUSH"]
-            else:
-                df_push = pd.DataFrame({"MES": [], "PUSH": []})
-            fig3, ax3 = plt.subplots(figsize=(8, 4))
-            if df_push.shape[0] > 0:
-                sns.barplot(data=df_push, x="MES", y="PUSH", ax=ax3)
-                ax3.set_title("PUSH por Mes")
+            if fig3 is not None:
                 st.pyplot(fig3)
 
             # =========================
-            # 9) Descarga
+            # 7/9) Salida y descarga (piat.salida, cacheado por trabajo y formato)
             # =========================
+            formato = st.selectbox(
+                "Formato de descarga",
+                options=list(FORMATOS_DESCARGA),
+                format_func=FORMATOS_DESCARGA.get,
+            )
+            incluir_entradas = st.checkbox(
+                "Incluir hojas de entrada sin cambios (Stock Disponible / Prioridad Clientes)",
+                value=True,
+            )
+            salida_bytes, diag_salida = exportar_salida_cache(trabajo.id, formato, incluir_entradas, resultado, entradas)
             st.download_button(
-                label="📥 Descargar archivo Excel",
-                data=output.getvalue(),
-                file_name="asignacion_resultados_PIAT_v1_4_2_fix_push.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                label=f"📥 Descargar {FORMATOS_DESCARGA[formato]}",
+                data=salida_bytes,
+                file_name=f"asignacion_resultados_PIAT_v1_4_2_fix_push{EXTENSION_SALIDA[formato]}",
+                mime=MIME_SALIDA[formato]
             )
 
+            # =========================
+            # 10) Diagnóstico de la corrida (piat.diagnostico)
+            # =========================
+            with st.expander("🩺 Diagnóstico (tiempos, memoria y contadores por etapa)"):
+                diagnostico = Diagnostico()
+                for parcial in (datos["diag_carga"], diag_motor, diag_graficos, diag_salida):
+                    diagnostico.extender(parcial)
+                st.caption(
+                    "Etapas cacheadas: se muestran los tiempos de la corrida que las calculó. "
+                    "rss_delta_mb = memoria residente que la etapa dejó retenida (fin − inicio); "
+                    "rss_pico_proceso_mb = pico de todo el proceso del servidor desde que arrancó, no de la etapa."
+                )
+                st.dataframe(diagnostico.tabla())
+                st.json(diagnostico.contadores)
+                st.download_button(
+                    label="📄 Descargar reporte JSON",
+                    data=diagnostico.a_json(archivo=datos["archivo"], sha256=datos["hash"], politica=modo, formato=formato),
+                    file_name="diagnostico_PIAT.json",
+                    mime="application/json",
+                )
+
     except Exception as e:
-        st.error(f"❌ Error al procesar el archivo: {e}")
+        st.error(f"❌ Error al mostrar el resultado: {e}")
@@ -0,0 +1,61 @@
+# =========================================================
+# Benchmark + equivalencia: horizonte móvil de "Continuo" (estado de cierre) vs corrida completa
+# Para cada mes de cierre, captura el estado al terminar ese mes, lo serializa (.zip Parquet)
+# y retoma la corrida desde ahí sobre el mismo template. Verifica que el resultado sea idéntico
+# al de la corrida completa y reporta tiempos y tamaño del estado según la fracción cerrada.
+#   python -m benchmarks.bench_cierre [--codigos 20000] [--meses 12] [--cierres 3,6,9,11]
+# =========================================================
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from piat.cierre import EstadoContinuo, ejecutar_continuo_rodante
+from piat.entradas import normalizar_entradas
+from piat.motor import POLITICA_CONTINUO, ejecutar_asignacion
+from piat.sintetico import generar_tablas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Speedup y equivalencia del horizonte móvil de Continuo.")
+    parser.add_argument("--codigos", type=int, default=20_000)
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidad", type=float, default=0.2)
+    parser.add_argument("--cierres", default=None, help="Meses de cierre separados por coma (por defecto: 1/4, 1/2, 3/4 y el penúltimo).")
+    args = parser.parse_args(argv)
+    cierres = (
+        [int(m) for m in args.cierres.split(",")] if args.cierres
+        else sorted({max(1, args.meses // 4), args.meses // 2, 3 * args.meses // 4, args.meses - 1})
+    )
+
+    entradas = normalizar_entradas(*generar_tablas(args.codigos, args.clientes, args.meses, args.densidad))
+    t0 = time.perf_counter()
+    completo = ejecutar_asignacion(entradas, POLITICA_CONTINUO)
+    t_completo = time.perf_counter() - t0
+    print(f"Códigos: {args.codigos:,} | meses: {args.meses} | corrida completa: {t_completo:.2f} s")
+    print(f"{'cierre':>6} {'captura (s)':>12} {'estado (MB)':>12} {'retoma (s)':>11} {'speedup':>8}")
+
+    for mes in cierres:
+        t0 = time.perf_counter()
+        _, estado = ejecutar_continuo_rodante(entradas, mes_cierre=mes)
+        datos = estado.a_bytes()
+        t_captura = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        retomado, _ = ejecutar_continuo_rodante(entradas, EstadoContinuo.cargar(datos))
+        t_retoma = time.perf_counter() - t0
+
+        pd.testing.assert_frame_equal(completo.df_asig_idx, retomado.df_asig_idx)
+        pd.testing.assert_frame_equal(completo.df_min_metrics, retomado.df_min_metrics)
+        print(
+            f"{mes:>6} {t_captura:>12.2f} {len(datos) / 2**20:>12.1f} {t_retoma:>11.2f} "
+            f"{'x' + format(t_completo / max(t_retoma, 1e-9), '.1f'):>8}"
+        )
+    print("✅ Retomar desde cada cierre da el mismo resultado que la corrida completa")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
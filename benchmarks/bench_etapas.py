@@ -0,0 +1,197 @@
+# =========================================================
+# Benchmark de escalamiento por etapas (regresiones antes de cada release):
+# carga → normalización → índice de cuotas → motores → ensamblado → exportación → gráficos.
+# Por cada tamaño se genera un template sintético (Excel si entra en una hoja, si no una
+# carpeta Parquet) y se mide cada etapa por separado: segundos, códigos/s y, con --memoria,
+# el pico de memoria de la etapa (tracemalloc, en una segunda pasada).
+#   python -m benchmarks.bench_etapas [--tamanos 1000 5000 10000] [--memoria]
+#                                     [--json actual.json] [--base release_anterior.json --tolerancia 1.5]
+# =========================================================
+import argparse
+import io
+import json
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+
+from piat.entradas import leer_entradas, normalizar_entradas
+from piat.graficos import figuras
+from piat.motor import (
+    POLITICA_CONTINUO,
+    ResultadoAsignacion,
+    asignar_continuo,
+    asignar_solo_en_su_mes,
+    asignar_solo_en_su_mes_vectorizado,
+    metricas_minimos,
+    preparar_asignacion,
+)
+from piat.salida import EXTENSION_SALIDA, FORMATOS_SALIDA, escribir_salida
+from piat.sintetico import escribir_tablas, escribir_template, generar_tablas
+
+ETAPAS = (
+    "carga",
+    "normalizacion",
+    "indice_cuotas",
+    "solo_mes",
+    "solo_mes_vectorizado",
+    "continuo",
+    "ensamblado",
+    "exportacion",
+    "graficos",
+)
+
+
+@contextmanager
+def _etapa(nombre, registro, memoria):
+    """Registra segundos de la etapa o, con memoria=True, el pico adicional (bytes) durante la etapa."""
+    if memoria:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    yield
+    if memoria:
+        registro[nombre] = tracemalloc.get_traced_memory()[1] - base
+    else:
+        registro[nombre] = time.perf_counter() - t0
+
+
+def correr_etapas(origen, carpeta_tmp: Path, formato_salida: str, omitir=(), memoria=False) -> dict:
+    """Una pasada completa; devuelve {etapa: segundos} (o {etapa: bytes} con memoria=True)."""
+    registro = {}
+    if memoria:
+        tracemalloc.start()
+    try:
+        with _etapa("carga", registro, memoria):
+            tablas = leer_entradas(origen)
+        with _etapa("normalizacion", registro, memoria):
+            entradas = normalizar_entradas(*tablas)
+        del tablas
+        with _etapa("indice_cuotas", registro, memoria):
+            prep = preparar_asignacion(entradas)
+
+        if "solo_mes" not in omitir:
+            with _etapa("solo_mes", registro, memoria):
+                asignar_solo_en_su_mes(prep)
+            prep = preparar_asignacion(entradas)  # los motores de loops consumen las cuotas
+        if "solo_mes_vectorizado" not in omitir:
+            prep_vect = preparar_asignacion(entradas)
+            with _etapa("solo_mes_vectorizado", registro, memoria):
+                asignar_solo_en_su_mes_vectorizado(prep_vect)
+            del prep_vect
+
+        with _etapa("continuo", registro, memoria):
+            salida = asignar_continuo(prep)
+        with _etapa("ensamblado", registro, memoria):
+            resultado = ResultadoAsignacion(
+                modo=POLITICA_CONTINUO,
+                df_asig_idx=salida.a_dataframe(),
+                df_min_metrics=metricas_minimos(prep.df_min_pos, prep.cuotas.asignado_por_fila()),
+                columnas_asig=prep.columnas_asig,
+            )
+        del salida, prep
+
+        if "exportacion" not in omitir:
+            destino = carpeta_tmp / f"salida{EXTENSION_SALIDA[formato_salida]}"
+            with _etapa("exportacion", registro, memoria):
+                escribir_salida(destino, resultado, entradas, formato_salida)
+        if "graficos" not in omitir:
+            with _etapa("graficos", registro, memoria):
+                for fig in figuras(resultado.df_asig_idx):
+                    if fig is not None:
+                        fig.savefig(io.BytesIO(), format="png")  # como st.pyplot
+                        plt.close(fig)
+    finally:
+        if memoria:
+            tracemalloc.stop()
+    return registro
+
+
+def _preparar_origen(carpeta_tmp: Path, n_codigos, args):
+    """Template .xlsx si entra en una hoja de Excel; si no (o con --origen parquet), carpeta Parquet."""
+    tablas = generar_tablas(n_codigos, args.clientes, args.meses, args.densidad, sesgo_stock=args.sesgo_stock)
+    if args.origen == "xlsx":
+        destino = carpeta_tmp / f"template_{n_codigos}.xlsx"
+        try:
+            escribir_template(destino, *tablas)
+            return destino, "xlsx", len(tablas[2])
+        except ValueError:
+            pass
+    destino = escribir_tablas(carpeta_tmp / f"tablas_{n_codigos}", *tablas, formato="parquet")
+    return destino, "parquet", len(tablas[2])
+
+
+def _comparar_con_base(registros, base, tolerancia) -> list:
+    """Etapas (tamaño, etapa, factor) más lentas que la base por encima de `tolerancia`."""
+    previos = {(r["codigos"], r["etapa"]): r["segundos"] for r in base}
+    regresiones = []
+    for r in registros:
+        anterior = previos.get((r["codigos"], r["etapa"]))
+        if anterior and anterior > 0:
+            factor = r["segundos"] / anterior
+            if factor > tolerancia:
+                regresiones.append((r["codigos"], r["etapa"], factor))
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo, throughput y memoria por etapa a distintos tamaños.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 5_000, 10_000], help="Cantidades de códigos (hasta 100000).")
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidad", type=float, default=0.2)
+    parser.add_argument("--sesgo-stock", type=float, default=0.0)
+    parser.add_argument("--origen", choices=("xlsx", "parquet"), default="xlsx", help="Formato de entrada (xlsx cae a parquet si no entra en una hoja).")
+    parser.add_argument("--formato-salida", choices=FORMATOS_SALIDA, default="xlsx_stream")
+    parser.add_argument("--omitir", nargs="*", default=[], choices=ETAPAS, help="Etapas a omitir (p. ej. solo_mes con tamaños grandes).")
+    parser.add_argument("--memoria", action="store_true", help="Segunda pasada con tracemalloc para el pico por etapa (lenta).")
+    parser.add_argument("--json", type=Path, default=None, help="Guardar los resultados en JSON.")
+    parser.add_argument("--base", type=Path, default=None, help="JSON de una corrida anterior para detectar regresiones.")
+    parser.add_argument("--tolerancia", type=float, default=1.5, help="Factor máximo de tiempo vs la base.")
+    args = parser.parse_args(argv)
+
+    registros = []
+    print(f"{'códigos':>8} {'origen':<8} {'etapa':<21} {'seg':>8} {'códigos/s':>11} {'pico (MB)':>10}")
+    for n in args.tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            carpeta_tmp = Path(tmp)
+            origen, tipo_origen, filas_min = _preparar_origen(carpeta_tmp, n, args)
+            tiempos = correr_etapas(origen, carpeta_tmp, args.formato_salida, args.omitir)
+            picos = correr_etapas(origen, carpeta_tmp, args.formato_salida, args.omitir, memoria=True) if args.memoria else {}
+        for etapa, seg in tiempos.items():
+            pico = picos.get(etapa)
+            registros.append({
+                "codigos": n,
+                "filas_minimos": filas_min,
+                "origen": tipo_origen,
+                "etapa": etapa,
+                "segundos": seg,
+                "codigos_por_seg": n / seg if seg > 0 else None,
+                "pico_mb": pico / 2**20 if pico is not None else None,
+            })
+            print(f"{n:>8,} {tipo_origen:<8} {etapa:<21} {seg:>8.2f} {n / max(seg, 1e-9):>11,.0f} "
+                  f"{(f'{pico / 2**20:.1f}' if pico is not None else '-'):>10}")
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{n:>8,} {'':<8} {'(RSS pico del proceso)':<21} {'':>8} {'':>11} {rss_mb:>10.1f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(registros, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultados guardados en {args.json}")
+
+    if args.base:
+        regresiones = _comparar_con_base(registros, json.loads(args.base.read_text(encoding="utf-8")), args.tolerancia)
+        for n, etapa, factor in regresiones:
+            print(f"❌ Regresión: {etapa} con {n:,} códigos tarda x{factor:.2f} respecto de la base")
+        if regresiones:
+            return 1
+        print(f"✅ Sin regresiones respecto de {args.base} (tolerancia x{args.tolerancia:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
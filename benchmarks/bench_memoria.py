@@ -0,0 +1,89 @@
+# =========================================================
+# Benchmark de memoria: modelo compacto de cuotas (ids enteros + arrays paralelos)
+# vs el modelo anterior de dicts con claves (MES, Codigo, Cliente).
+# Mide con tracemalloc la memoria retenida y el pico de:
+#   - las estructuras de cuotas (CuotasCompactas vs los 5 dicts del modelo anterior)
+#   - la preparación completa y cada motor de loops
+#   python -m benchmarks.bench_memoria [--codigos 10000] [--clientes 20] [--meses 12]
+# =========================================================
+import argparse
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+from piat.entradas import _safe_int, normalizar_entradas
+from piat.indices import CuotasCompactas, etiquetas_codigo
+from piat.motor import asignar_continuo, asignar_solo_en_su_mes, definir_horizonte, preparar_asignacion
+from piat.sintetico import generar_tablas
+
+
+def _cuotas_dicts(df_min_pos):
+    """Estructuras de cuotas del modelo anterior (referencia de memoria; ya no las usa el motor)."""
+    cuotas = {idx: _safe_int(q) for idx, q in df_min_pos["Minimo"].items()}
+    asignado_cuota = {idx: 0 for idx in cuotas}
+    cuotas_por_cod_cli = defaultdict(list)
+    for (mes_obj, cod, cli), qty in cuotas.items():
+        cuotas_por_cod_cli[(cod, cli)].append((mes_obj, qty, (mes_obj, cod, cli)))
+    for k in cuotas_por_cod_cli:
+        cuotas_por_cod_cli[k].sort(key=lambda t: t[0])
+    last_mes_por_codigo = df_min_pos.reset_index().groupby("Codigo")["MES"].max().to_dict()
+    pendiente_por_codigo = defaultdict(int)
+    for (_, cod, _), qty in cuotas.items():
+        pendiente_por_codigo[cod] += max(0, qty)
+    return cuotas, asignado_cuota, cuotas_por_cod_cli, last_mes_por_codigo, pendiente_por_codigo
+
+
+def medir(funcion, *args):
+    """(valor, segundos, retenido_mb, pico_mb) de una llamada, relativo a la memoria previa."""
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    valor = funcion(*args)
+    segundos = time.perf_counter() - t0
+    actual, pico = tracemalloc.get_traced_memory()
+    return valor, segundos, (actual - base) / 2**20, (pico - base) / 2**20
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Memoria del modelo compacto de cuotas vs dicts por cuota.")
+    parser.add_argument("--codigos", type=int, default=10_000)
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidad", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    entradas = normalizar_entradas(*generar_tablas(args.codigos, args.clientes, args.meses, args.densidad, args.seed))
+    df_min_pos, _, _, columnas_asig = definir_horizonte(entradas)
+    etiquetas = etiquetas_codigo(entradas.df_stock)
+    print(f"Códigos: {args.codigos:,} | cuotas: {len(df_min_pos):,} (segundos con tracemalloc activo)")
+    print(f"{'estructura':<28} {'seg':>7} {'retenido (MB)':>14} {'pico (MB)':>10}")
+
+    tracemalloc.start()
+    try:
+        filas = []
+        dicts, *medicion = medir(_cuotas_dicts, df_min_pos)
+        filas.append(("cuotas: dicts (anterior)", *medicion))
+        del dicts
+        compactas, *medicion = medir(CuotasCompactas.desde_df, df_min_pos, etiquetas, columnas_asig[:-1])
+        filas.append(("cuotas: CuotasCompactas", *medicion))
+        del compactas
+        prep, *medicion = medir(preparar_asignacion, entradas)
+        filas.append(("preparación completa", *medicion))
+        for motor in (asignar_solo_en_su_mes, asignar_continuo):
+            prep = preparar_asignacion(entradas)  # los motores de loops consumen las cuotas
+            _, *medicion = medir(motor, prep)
+            filas.append((motor.__name__, *medicion))
+    finally:
+        tracemalloc.stop()
+
+    for nombre, seg, retenido, pico in filas:
+        print(f"{nombre:<28} {seg:>7.2f} {retenido:>14.1f} {pico:>10.1f}")
+    factor = filas[0][2] / max(filas[1][2], 1e-9)
+    print(f"Reducción de memoria retenida por las cuotas: x{factor:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# =========================================================
+# Benchmark "Óptimo" (programación lineal por código) vs "Continuo" (greedy):
+# tiempo total, tiempo de solver, gap y cumplimiento por cliente.
+#   python -m benchmarks.bench_optimo [--codigos 2000] [--procesos 4]
+# =========================================================
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from piat.entradas import normalizar_entradas
+from piat.motor import POLITICA_CONTINUO, POLITICA_OPTIMO, ejecutar_asignacion
+from piat.optimo import comparar_cumplimiento, resumen_optimizacion
+from piat.sintetico import generar_tablas
+
+
+def _cronometrar(entradas, modo, procesos):
+    t0 = time.perf_counter()
+    resultado = ejecutar_asignacion(entradas, modo, procesos=procesos)
+    return resultado, time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cumplimiento y tiempos de 'Óptimo' frente a 'Continuo'.")
+    parser.add_argument("--codigos", type=int, default=2_000)
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidad", type=float, default=0.2)
+    parser.add_argument("--procesos", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    entradas = normalizar_entradas(*generar_tablas(args.codigos, args.clientes, args.meses, args.densidad))
+
+    res_continuo, t_continuo = _cronometrar(entradas, POLITICA_CONTINUO, args.procesos)
+    res_optimo, t_optimo = _cronometrar(entradas, POLITICA_OPTIMO, args.procesos)
+    resumen = resumen_optimizacion(res_optimo.optimizacion)
+
+    print(f"Códigos: {args.codigos:,} | procesos: {args.procesos}")
+    print(f"Continuo: {t_continuo:8.2f} s")
+    print(f"Óptimo:   {t_optimo:8.2f} s  (solver: {resumen['tiempo_solver_s']:.2f} s, gap máx: {resumen['gap_max']:.2e})")
+    print(f"Códigos por estado: {resumen['por_estado']}")
+    with pd.option_context("display.width", 120, "display.max_columns", 10):
+        print(comparar_cumplimiento({POLITICA_CONTINUO: res_continuo, POLITICA_OPTIMO: res_optimo}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# =========================================================
+# Benchmark de regresión: escalamiento de `asignar_continuo` vs filas de cuotas
+# El chequeo "código terminado" (pendientes_codigo) debe ser O(1): el costo por
+# fila de cuota tiene que mantenerse aproximadamente constante al crecer el template.
+#   python -m benchmarks.bench_pendientes [--tamanos 250 500 1000 2000 4000] [--max-factor 3]
+# =========================================================
+import argparse
+import sys
+import time
+
+from piat.entradas import normalizar_entradas
+from piat.motor import asignar_continuo, preparar_asignacion
+from piat.sintetico import generar_tablas
+
+
+def medir(n_codigos, n_clientes, n_meses, densidad, seed=0):
+    entradas = normalizar_entradas(*generar_tablas(n_codigos, n_clientes, n_meses, densidad, seed))
+    prep = preparar_asignacion(entradas)
+    t0 = time.perf_counter()
+    asignar_continuo(prep)
+    return len(prep.cuotas), time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Escalamiento de asignar_continuo vs filas de cuotas.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000], help="Cantidades de códigos a medir.")
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidad", type=float, default=0.2)
+    parser.add_argument("--max-factor", type=float, default=3.0, help="Crecimiento máximo tolerado del costo por cuota (mayor vs menor tamaño).")
+    args = parser.parse_args(argv)
+
+    print(f"{'códigos':>8} {'cuotas':>9} {'seg':>8} {'µs/cuota':>9}")
+    costos = []
+    for n in args.tamanos:
+        n_cuotas, seg = medir(n, args.clientes, args.meses, args.densidad)
+        costo = seg / max(n_cuotas, 1) * 1e6
+        costos.append(costo)
+        print(f"{n:>8,} {n_cuotas:>9,} {seg:>8.2f} {costo:>9.2f}")
+
+    factor = costos[-1] / costos[0] if costos[0] > 0 else 0.0
+    print(f"Factor de crecimiento µs/cuota: {factor:.2f} (máximo {args.max_factor:.2f})")
+    if factor > args.max_factor:
+        print("❌ Regresión: el costo por cuota crece con el tamaño (¿barrido completo de cuotas?)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
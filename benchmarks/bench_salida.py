@@ -0,0 +1,64 @@
+# =========================================================
+# Benchmark de escritura de resultados: tiempo, pico de memoria (tracemalloc) y tamaño
+# por formato de salida, con y sin las hojas de entrada sin cambios.
+#   python -m benchmarks.bench_salida [--codigos 1000] [--sin-memoria] [--formatos xlsx xlsx_stream zip_parquet zip_csv]
+# =========================================================
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from piat.entradas import normalizar_entradas
+from piat.motor import POLITICA_CONTINUO, ejecutar_asignacion
+from piat.salida import EXTENSION_SALIDA, FORMATOS_ASIGNACION, FORMATOS_SALIDA, escribir_salida
+from piat.sintetico import generar_tablas
+
+
+def _medir(destino, resultado, entradas, formato, formato_asignacion, incluir_entradas, memoria=True):
+    """Tiempo sin trazar (tracemalloc encarece mucho openpyxl) y, aparte, pico de memoria."""
+    t0 = time.perf_counter()
+    escribir_salida(destino, resultado, entradas, formato, formato_asignacion, incluir_entradas)
+    segundos = time.perf_counter() - t0
+    pico = float("nan")
+    if memoria:
+        tracemalloc.start()
+        escribir_salida(destino, resultado, entradas, formato, formato_asignacion, incluir_entradas)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return segundos, pico, destino.stat().st_size
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo, memoria y tamaño de cada formato de salida.")
+    parser.add_argument("--codigos", type=int, default=1_000)
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidad", type=float, default=0.2)
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS_SALIDA, default=list(FORMATOS_SALIDA))
+    parser.add_argument("--formato-asignacion", choices=FORMATOS_ASIGNACION, default="ancho")
+    parser.add_argument("--sin-memoria", action="store_true", help="Solo tiempos (sin la pasada con tracemalloc).")
+    args = parser.parse_args(argv)
+
+    entradas = normalizar_entradas(*generar_tablas(args.codigos, args.clientes, args.meses, args.densidad))
+    resultado = ejecutar_asignacion(entradas, POLITICA_CONTINUO)
+    print(f"Códigos: {args.codigos:,} | filas asignación: {len(resultado.df_asig_idx):,} | "
+          f"filas mínimos: {len(resultado.df_min_metrics):,}")
+    print(f"{'formato':<12} {'entradas':<9} {'tiempo (s)':>10} {'pico (MB)':>10} {'tamaño (MB)':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for formato in args.formatos:
+            for incluir_entradas in (True, False):
+                destino = Path(tmp) / f"salida_{formato}_{int(incluir_entradas)}{EXTENSION_SALIDA[formato]}"
+                segundos, pico, tamano = _medir(
+                    destino, resultado, entradas, formato, args.formato_asignacion, incluir_entradas,
+                    memoria=not args.sin_memoria,
+                )
+                print(f"{formato:<12} {'sí' if incluir_entradas else 'no':<9} {segundos:10.2f} "
+                      f"{pico / 2**20:10.1f} {tamano / 2**20:12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
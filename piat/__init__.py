@@ -0,0 +1,83 @@
+"""PIAS — motor de asignación de stock por cliente y mes (sin dependencias de UI)."""
+from .acumulador import AcumuladorSalida, asignacion_larga
+from .cierre import EstadoContinuo, ejecutar_continuo_rodante
+from .delta import AlmacenDelta, ejecutar_asignacion_delta
+from .diagnostico import Diagnostico
+from .entradas import (
+    ARCHIVOS_TABLAS,
+    HOJA_MINIMOS,
+    HOJA_PRIORIDAD,
+    HOJA_STOCK,
+    Entradas,
+    cargar_entradas,
+    leer_entradas,
+    leer_excel,
+    leer_tablas,
+    normalizar_entradas,
+)
+from .motor import (
+    POLITICA_CONTINUO,
+    POLITICA_OPTIMO,
+    POLITICA_SOLO_MES,
+    POLITICAS,
+    ResultadoAsignacion,
+    asignar,
+    ejecutar_asignacion,
+)
+from .progreso import CorridaCancelada, Progreso
+from .salida import (
+    EXTENSION_SALIDA,
+    FORMATOS_ASIGNACION,
+    FORMATOS_SALIDA,
+    HOJA_ASIGNACION,
+    MIME_SALIDA,
+    MIME_XLSX,
+    escribir_excel,
+    escribir_salida,
+    exportar_excel,
+    exportar_salida,
+    tabla_asignacion,
+)
+from .trabajos import GestorTrabajos, Trabajo
+
+__all__ = [
+    "ARCHIVOS_TABLAS",
+    "EXTENSION_SALIDA",
+    "FORMATOS_ASIGNACION",
+    "FORMATOS_SALIDA",
+    "HOJA_ASIGNACION",
+    "HOJA_MINIMOS",
+    "HOJA_PRIORIDAD",
+    "HOJA_STOCK",
+    "MIME_SALIDA",
+    "MIME_XLSX",
+    "POLITICAS",
+    "POLITICA_CONTINUO",
+    "POLITICA_OPTIMO",
+    "POLITICA_SOLO_MES",
+    "AcumuladorSalida",
+    "AlmacenDelta",
+    "CorridaCancelada",
+    "Diagnostico",
+    "Entradas",
+    "EstadoContinuo",
+    "GestorTrabajos",
+    "Progreso",
+    "ResultadoAsignacion",
+    "Trabajo",
+    "asignacion_larga",
+    "asignar",
+    "cargar_entradas",
+    "ejecutar_asignacion",
+    "ejecutar_asignacion_delta",
+    "ejecutar_continuo_rodante",
+    "escribir_excel",
+    "escribir_salida",
+    "exportar_excel",
+    "exportar_salida",
+    "leer_entradas",
+    "leer_excel",
+    "leer_tablas",
+    "normalizar_entradas",
+    "tabla_asignacion",
+]
@@ -0,0 +1,122 @@
+# =========================================================
+# PIAS — Acumulador columnar de la salida del motor
+# Reemplaza la lista de dicts por fila (uno por (MES, Codigo) con TODAS las columnas
+# de clientes) + pd.DataFrame + groupby. Se guardan:
+#   - filas:     MES, Codigo y PUSH por fila (Codigo = id entero si se pasan `etiquetas`)
+#   - tripletas: (fila, cliente, cantidad) solo para asignaciones > 0 (formato COO)
+# y la matriz densa (MES, Codigo) × clientes se arma una sola vez al final.
+# Las columnas numéricas son array.array (8 bytes por valor, sin un objeto int por celda).
+# =========================================================
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+
+class AcumuladorSalida:
+    __slots__ = ("columnas_asig", "etiquetas", "meses", "codigos", "push", "coo_fila", "coo_cliente", "coo_cantidad")
+
+    def __init__(self, columnas_asig: list, etiquetas=None):
+        self.columnas_asig = columnas_asig  # clientes por prioridad + "PUSH" al final
+        self.etiquetas = etiquetas  # con etiquetas, `codigos` guarda ids (posición en etiquetas)
+        self.meses = array("q")
+        self.codigos = [] if etiquetas is None else array("q")
+        self.push = array("d")
+        self.coo_fila = array("q")
+        self.coo_cliente = array("q")
+        self.coo_cantidad = array("d")
+
+    def __len__(self):
+        return len(self.meses)
+
+    def agregar_fila(self, mes, codigo, asignaciones=(), push: float = 0.0) -> int:
+        """Registra una fila (MES, Codigo); `asignaciones` = pares (j_cliente, cantidad)."""
+        fila = len(self.meses)
+        self.meses.append(mes)
+        self.codigos.append(codigo)
+        self.push.append(push)
+        for j, cantidad in asignaciones:
+            self.coo_fila.append(fila)
+            self.coo_cliente.append(j)
+            self.coo_cantidad.append(cantidad)
+        return fila
+
+    def extender(self, otro: "AcumuladorSalida"):
+        """Agrega las filas de otro acumulador (p. ej. un fragmento de la ejecución paralela)."""
+        offset = len(self.meses)
+        self.meses.extend(otro.meses)
+        self.codigos.extend(otro.codigos)
+        self.push.extend(otro.push)
+        self.coo_fila.extend(f + offset for f in otro.coo_fila)
+        self.coo_cliente.extend(otro.coo_cliente)
+        self.coo_cantidad.extend(otro.coo_cantidad)
+
+    def primeras(self, n_filas: int) -> "AcumuladorSalida":
+        """Copia con las primeras `n_filas` filas registradas (p. ej. los meses ya cerrados)."""
+        otro = AcumuladorSalida(self.columnas_asig, self.etiquetas)
+        n_coo = bisect_left(self.coo_fila, n_filas)  # coo_fila es creciente
+        otro.meses = self.meses[:n_filas]
+        otro.codigos = self.codigos[:n_filas]
+        otro.push = self.push[:n_filas]
+        otro.coo_fila = self.coo_fila[:n_coo]
+        otro.coo_cliente = self.coo_cliente[:n_coo]
+        otro.coo_cantidad = self.coo_cantidad[:n_coo]
+        return otro
+
+    def _consolidar(self):
+        """
+        Ordena por (MES, Codigo) y suma filas repetidas (p. ej. el fallback de carry en mes_final).
+        Devuelve (mes, codigo, fila_final) con fila_final = fila consolidada de cada fila registrada;
+        `codigo` ya trae las etiquetas.
+        """
+        mes_id, mes_uniq = pd.factorize(np.asarray(self.meses, dtype=np.int64), sort=True)
+        if self.etiquetas is None:
+            cod_id, cod_uniq = pd.factorize(np.asarray(self.codigos, dtype=object), sort=True)
+            cod_uniq = np.asarray(cod_uniq, dtype=object)
+        else:  # los ids ya respetan el orden de las etiquetas
+            cod_id, cod_uniq = np.asarray(self.codigos, dtype=np.int64), np.asarray(self.etiquetas, dtype=object)
+        clave = mes_id.astype(np.int64) * len(cod_uniq) + cod_id
+        claves, fila_final = np.unique(clave, return_inverse=True)
+        mes = np.asarray(mes_uniq)[claves // len(cod_uniq)]
+        codigo = cod_uniq[claves % len(cod_uniq)]
+        return mes, codigo, fila_final
+
+    def a_dataframe(self) -> pd.DataFrame:
+        """df_asig_idx: índice (MES, Codigo) ordenado; clientes en int64 y PUSH en float64."""
+        clientes = self.columnas_asig[:-1]
+        if len(self.meses) == 0:
+            vacio = pd.DataFrame(columns=["MES", "Codigo"] + self.columnas_asig).set_index(["MES", "Codigo"])
+            return vacio.reindex(columns=self.columnas_asig).fillna(0)
+
+        mes, codigo, fila_final = self._consolidar()
+        n_filas, n_cli = len(mes), len(clientes)
+        plano = fila_final[np.asarray(self.coo_fila, dtype=np.int64)] * n_cli + np.asarray(self.coo_cliente, dtype=np.int64)
+        matriz = np.bincount(
+            plano, weights=np.asarray(self.coo_cantidad, dtype=np.float64), minlength=n_filas * n_cli
+        ).astype(np.int64).reshape(n_filas, n_cli)
+        push = np.bincount(fila_final, weights=np.asarray(self.push, dtype=np.float64), minlength=n_filas)
+
+        indice = pd.MultiIndex.from_arrays([mes, codigo], names=["MES", "Codigo"])
+        df_asig_idx = pd.DataFrame(matriz, index=indice, columns=clientes)
+        df_asig_idx["PUSH"] = push
+        return df_asig_idx
+
+
+def asignacion_larga(df_asig_idx: pd.DataFrame) -> pd.DataFrame:
+    """
+    Forma larga/dispersa de df_asig_idx: una fila por (MES, Codigo, Cliente) con cantidad > 0
+    (PUSH incluido). Útil cuando la mayoría de las columnas de clientes son 0.
+    """
+    columnas = ["MES", "Codigo", "Cliente", "Asignado"]
+    mes = df_asig_idx.index.get_level_values(0).to_numpy()
+    codigo = df_asig_idx.index.get_level_values(1).to_numpy()
+    partes = []
+    for cliente in df_asig_idx.columns:  # columna a columna: no se copia la matriz completa
+        valores = df_asig_idx[cliente].to_numpy()
+        nz = np.flatnonzero(valores > 0)
+        if len(nz):
+            partes.append(pd.DataFrame({"MES": mes[nz], "Codigo": codigo[nz], "Cliente": cliente, "Asignado": valores[nz]}))
+    if not partes:
+        return pd.DataFrame(columns=columnas)
+    return pd.concat(partes, ignore_index=True).sort_values(["MES", "Codigo"], kind="stable", ignore_index=True)
@@ -0,0 +1,211 @@
+# =========================================================
+# PIAS — Horizonte móvil de "Continuo": estado de cierre entre corridas mensuales
+# Los meses ya cerrados no cambian. En lugar de recalcular el horizonte completo en cada corrida,
+# se guarda el estado de `asignar_continuo` al terminar el mes de cierre:
+#   - carry por código (solo códigos con carry abierto)
+#   - asignado acumulado por cuota (MES, Codigo, Cliente), solo > 0
+#   - filas de la asignación de los meses cerrados (se re-exportan tal cual: historia estable)
+# La corrida siguiente retoma ese estado y procesa solo los meses posteriores al cierre; el
+# pendiente por código se recalcula como Σ max(mínimo − asignado, 0) sobre las cuotas del template
+# nuevo. El stock y las cuotas de meses cerrados del template nuevo no se vuelven a procesar.
+# Con el mismo template, retomar desde un cierre da el mismo resultado que la corrida completa.
+#
+# Formato: un .zip con meta.json + una tabla Parquet por parte (columnar y comprimido).
+# meta.json guarda la clave del template (p. ej. CH, MX o AR): retomar con otra clave es un error,
+# para que el estado de un template no termine en la salida de otro.
+# =========================================================
+import dataclasses
+import io
+import json
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .diagnostico import etapa
+from .entradas import Entradas
+from .indices import ids_codigo
+from .motor import (
+    POLITICA_CONTINUO,
+    ResultadoAsignacion,
+    asignar_continuo,
+    construir_preparacion,
+    definir_horizonte,
+    metricas_minimos,
+)
+
+VERSION_ESTADO = 1
+EXTENSION_ESTADO = ".zip"
+
+
+@dataclass
+class EstadoContinuo:
+    """Estado de "Continuo" al terminar `mes_cierre`, con etiquetas (independiente de los ids del motor)."""
+    mes_cierre: int
+    carry: pd.Series               # Codigo → carry abierto
+    asignado: pd.Series            # (MES, Codigo, Cliente) → asignado acumulado (> 0)
+    df_asig_cerrado: pd.DataFrame  # asignación de los meses ≤ mes_cierre, índice (MES, Codigo)
+    meta: dict = field(default_factory=dict)
+
+    def a_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as zf:  # Parquet ya comprime
+            meta = {**self.meta, "version": VERSION_ESTADO, "mes_cierre": int(self.mes_cierre)}
+            zf.writestr("meta.json", json.dumps(meta, indent=2, ensure_ascii=False))
+            tablas = {
+                "carry": self.carry.rename("Carry").rename_axis("Codigo").reset_index(),
+                "asignado": self.asignado.rename("Asignado").reset_index(),
+                "asignacion_cerrada": self.df_asig_cerrado.reset_index(),
+            }
+            for nombre, df in tablas.items():
+                with zf.open(f"{nombre}.parquet", "w") as handle:
+                    df.to_parquet(handle, index=False)
+        return buffer.getvalue()
+
+    def guardar(self, destino) -> Path:
+        destino = Path(destino)
+        destino.write_bytes(self.a_bytes())
+        return destino
+
+    @classmethod
+    def cargar(cls, origen) -> "EstadoContinuo":
+        """Lee un estado guardado (ruta, bytes o archivo abierto). Lanza ValueError si no es compatible."""
+        if isinstance(origen, bytes):
+            origen = io.BytesIO(origen)
+        with zipfile.ZipFile(origen) as zf:
+            meta = json.loads(zf.read("meta.json"))
+            if meta.get("version") != VERSION_ESTADO:
+                raise ValueError(f"Versión de estado de cierre no soportada: {meta.get('version')!r}")
+            tablas = {n: pd.read_parquet(io.BytesIO(zf.read(f"{n}.parquet"))) for n in ("carry", "asignado", "asignacion_cerrada")}
+        return cls(
+            mes_cierre=meta["mes_cierre"],
+            carry=tablas["carry"].set_index("Codigo")["Carry"],
+            asignado=tablas["asignado"].set_index(["MES", "Codigo", "Cliente"])["Asignado"],
+            df_asig_cerrado=tablas["asignacion_cerrada"].set_index(["MES", "Codigo"]),
+            meta=meta,
+        )
+
+
+def _unir_meses(cerrado: Optional[pd.DataFrame], abierto: pd.DataFrame, columnas_asig: list) -> pd.DataFrame:
+    """Asignación de meses cerrados + abiertos con las columnas de la corrida (suma filas repetidas)."""
+    partes = [df for df in (cerrado, abierto) if df is not None and len(df)] or [abierto]
+    df = pd.concat(partes).reindex(columns=columnas_asig, fill_value=0)
+    if not df.index.is_unique:  # fallback en mes_final ya cerrado
+        df = df.groupby(level=[0, 1]).sum()
+    df = df.sort_index()
+    return df.astype({**{c: np.int64 for c in columnas_asig[:-1]}, "PUSH": np.float64})
+
+
+def ejecutar_continuo_rodante(
+    entradas: Entradas,
+    estado: Optional[EstadoContinuo] = None,
+    mes_cierre=None,
+    diagnostico=None,
+    progreso=None,
+    clave: Optional[str] = None,
+):
+    """
+    "Continuo" retomando `estado` (si hay) y, con `mes_cierre`, capturando el estado al terminar ese mes.
+    Devuelve (resultado, estado_nuevo); resultado incluye las filas de los meses cerrados de `estado`.
+    `progreso` (piat.progreso) recibe el avance por mes abierto y permite cancelar.
+    `clave` identifica el template: se guarda en el estado nuevo y, si `estado` trae otra, lanza ValueError.
+    """
+    if estado is not None and mes_cierre is not None and mes_cierre <= estado.mes_cierre:
+        raise ValueError(f"El mes de cierre ({mes_cierre}) debe ser posterior al del estado anterior ({estado.mes_cierre}).")
+    clave_estado = estado.meta.get("clave") if estado is not None else None
+    if clave is not None and clave_estado is not None and clave_estado != clave:
+        raise ValueError(f"El estado de cierre es del template '{clave_estado}', no de '{clave}'.")
+    cierre_previo = estado.mes_cierre if estado is not None else None
+    if progreso is not None:
+        progreso.iniciar("4) Preparación (horizonte móvil)")
+
+    with etapa(diagnostico, "4) Preparación (horizonte móvil)") as registro:
+        df_stock = entradas.df_stock
+        if estado is not None:
+            # códigos con carry abierto o con stock en meses cerrados siguen siendo válidos aunque el
+            # template no traiga stock nuevo (sus cuotas siguen en las métricas, como en la corrida completa)
+            previos = estado.carry.index.union(estado.df_asig_cerrado.index.unique(level=1))
+            previos = previos.intersection(entradas.df_min.index.unique(level=1))
+            if len(previos.difference(entradas.cod_validos)):
+                entradas = dataclasses.replace(entradas, cod_validos=sorted(set(entradas.cod_validos).union(previos)))
+            df_stock = df_stock[df_stock["MES"] > cierre_previo]
+        df_min_pos, meses, mes_final, columnas_asig = definir_horizonte(entradas)
+        if estado is not None:
+            extra = [c for c in estado.df_asig_cerrado.columns if c != "PUSH" and c not in columnas_asig]
+            columnas_asig = columnas_asig[:-1] + extra + ["PUSH"]
+        meses_abiertos = [m for m in meses if cierre_previo is None or m > cierre_previo]
+
+        etiquetas = np.unique(np.concatenate([
+            entradas.df_stock["Codigo"].to_numpy(dtype=object),
+            *((previos.to_numpy(dtype=object), estado.carry.index.to_numpy(dtype=object)) if estado is not None else ()),
+        ]))
+        prep = construir_preparacion(df_stock, df_min_pos, meses_abiertos, mes_final, columnas_asig, etiquetas)
+        prep.progreso = progreso
+        if estado is not None:
+            asignado = np.zeros(len(df_min_pos), dtype=np.int64)
+            pos = df_min_pos.index.get_indexer(estado.asignado.index)
+            asignado[pos[pos >= 0]] = estado.asignado.to_numpy(dtype=np.int64)[pos >= 0]
+            prep.cuotas.restaurar_asignado(asignado)
+            ids = ids_codigo(etiquetas, estado.carry.index)
+            prep.carry_inicial = dict(zip(ids.tolist(), estado.carry.astype(np.int64).tolist()))
+        registro["filas"] = len(df_min_pos)
+        registro["meses_abiertos"] = len(meses_abiertos)
+
+    with etapa(diagnostico, f"5) Motor ({POLITICA_CONTINUO}, meses abiertos)") as registro:
+        salida = asignar_continuo(prep, mes_cierre)
+        registro["filas"] = len(salida)
+    contadores = {
+        **prep.contadores,
+        "meses_procesados": len(meses_abiertos),
+        "meses_cerrados": len(meses) - len(meses_abiertos),
+    }
+
+    cerrado_previo = estado.df_asig_cerrado if estado is not None else None
+    if progreso is not None:
+        progreso.iniciar("6) Ensamblado y métricas")
+    with etapa(diagnostico, "6) Ensamblado y métricas") as registro:
+        resultado = ResultadoAsignacion(
+            modo=POLITICA_CONTINUO,
+            df_asig_idx=_unir_meses(cerrado_previo, salida.a_dataframe(), columnas_asig),
+            df_min_metrics=metricas_minimos(df_min_pos, prep.cuotas.asignado_por_fila()),
+            columnas_asig=columnas_asig,
+            contadores=contadores,
+        )
+        registro["filas"] = len(resultado.df_asig_idx)
+
+    estado_nuevo = None
+    if mes_cierre is not None:
+        with etapa(diagnostico, f"6.3) Estado de cierre (mes {mes_cierre})") as registro:
+            cierre = prep.cierre
+            asignado = np.zeros(len(df_min_pos), dtype=np.int64)
+            asignado[prep.cuotas.fila] = cierre.asignado
+            asignado = pd.Series(asignado, index=df_min_pos.index)
+            estado_nuevo = EstadoContinuo(
+                mes_cierre=mes_cierre,
+                carry=pd.Series(
+                    list(cierre.carry.values()),
+                    index=pd.Index(etiquetas[list(cierre.carry.keys())], dtype=object, name="Codigo"),
+                    dtype=np.int64,
+                ),
+                asignado=asignado[asignado > 0],
+                df_asig_cerrado=_unir_meses(
+                    cerrado_previo, salida.primeras(cierre.filas_salida).a_dataframe(), columnas_asig
+                ),
+                meta={
+                    "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "politica": POLITICA_CONTINUO,
+                    "clave": clave if clave is not None else clave_estado,
+                    "mes_cierre_anterior": cierre_previo,
+                    "columnas_asig": columnas_asig,
+                },
+            )
+            registro["codigos_con_carry"] = len(cierre.carry)
+            registro["filas"] = len(estado_nuevo.df_asig_cerrado)
+
+    if diagnostico is not None:
+        diagnostico.sumar_contadores(contadores)
+    return resultado, estado_nuevo
@@ -0,0 +1,330 @@
+# =========================================================
+# PIAS — Re-ejecución delta: recalcular solo los códigos cuyas entradas cambiaron
+# En las tres políticas la asignación de un Codigo depende solo de sus filas de stock y de
+# mínimos, más una parte global: horizonte (meses, mes_final), columnas de clientes
+# (columnas_asig) y la hoja Prioridad Clientes. Se guarda en disco, por política:
+#   - una huella por código (hash de sus filas de stock y de mínimos > 0)
+#   - la huella de la parte global
+#   - el resultado (asignación, asignado por cuota y, en "Óptimo", el resumen del solver)
+# En la corrida siguiente, si la parte global no cambió, se recalculan solo los códigos con
+# huella distinta (o nuevos), con el horizonte de la corrida completa, y se unen con las filas
+# guardadas del resto. Si cambió, se recalcula todo. El resultado es idéntico al de una corrida
+# completa (salvo los contadores del motor, que cuentan solo lo recalculado).
+#
+# Almacén: <carpeta>/<clave>/<politica>/ultima.json apunta a la subcarpeta de la corrida
+# vigente (Parquet + meta.json). Cada corrida se escribe en una subcarpeta nueva y el puntero
+# se reemplaza al final (os.replace). Corridas concurrentes sobre la misma clave y política (p. ej.
+# dos trabajos de la app con la clave por defecto) se serializan con un bloqueo: entre hilos del
+# proceso y, donde hay fcntl, también entre procesos (archivo .bloqueo). Al guardar se conserva
+# además la corrida que estaba vigente, para que un lector sin bloqueo que ya leyó el puntero la
+# encuentre completa; se borra recién en el guardado siguiente.
+# =========================================================
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:  # no existe en Windows: ahí el bloqueo es solo entre hilos del proceso
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .diagnostico import etapa
+from .entradas import Entradas
+from .motor import POLITICA_CONTINUO, ResultadoAsignacion, definir_horizonte, ejecutar_asignacion, metricas_minimos
+
+VERSION_ALMACEN = 1
+CARPETA_ALMACEN = Path(os.environ.get("PIAT_ALMACEN_DELTA", ".piat_delta"))
+CLAVE_POR_DEFECTO = "principal"
+PUNTERO = "ultima.json"
+BLOQUEO = ".bloqueo"
+
+_BLOQUEOS = {}  # ruta del archivo de bloqueo → RLock (hilos del proceso)
+_BLOQUEOS_LOCK = threading.Lock()
+
+MOTIVO_SIN_PREVIA = "sin corrida previa"
+MOTIVO_PRIORIDAD = "cambió Prioridad Clientes"
+MOTIVO_HORIZONTE = "cambió el horizonte o los clientes con mínimos"
+MOTIVO_DELTA = "por código"
+
+
+# =========================
+# Huellas
+# =========================
+def huellas_por_codigo(entradas: Entradas) -> pd.Series:
+    """
+    Huella (uint64) de las entradas de cada Codigo: suma de los hashes de sus filas de stock y de
+    mínimos > 0. La suma no depende del orden de las filas en el template.
+    """
+    stock = entradas.df_stock[["MES", "Codigo", "Stock Disponible"]]
+    minimos = entradas.df_min[entradas.df_min["Minimo"] > 0].reset_index()[["MES", "Codigo", "Cliente", "Minimo"]]
+    codigos = np.concatenate([stock["Codigo"].to_numpy(dtype=object), minimos["Codigo"].to_numpy(dtype=object)])
+    hashes = np.concatenate([
+        pd.util.hash_pandas_object(stock, index=False).to_numpy(),
+        pd.util.hash_pandas_object(minimos, index=False).to_numpy(),
+    ])
+    ids, unicos = pd.factorize(codigos, sort=True)
+    huellas = np.zeros(len(unicos), dtype=np.uint64)
+    np.add.at(huellas, ids, hashes)  # módulo 2**64
+    return pd.Series(huellas, index=pd.Index(unicos, dtype=object, name="Codigo"), name="huella")
+
+
+def _sha256(datos) -> str:
+    return hashlib.sha256(json.dumps(datos, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def huellas_globales(entradas: Entradas, modo: str, meses, mes_final, columnas_asig) -> dict:
+    """Huellas de la parte global: prioridades (hoja completa) y horizonte + columnas de clientes."""
+    prioridad = sorted(zip(entradas.prioridad_series.index.astype(str), entradas.prioridad_series.astype(int)))
+    return {
+        "prioridad": _sha256(prioridad),
+        "horizonte": _sha256({
+            "politica": modo,
+            "meses": [int(m) for m in meses],
+            "mes_final": int(mes_final),
+            "columnas_asig": list(columnas_asig),
+        }),
+    }
+
+
+# =========================
+# Almacén en disco
+# =========================
+@dataclass
+class CorridaGuardada:
+    """Lo que se necesita de la corrida anterior para unir resultados."""
+    meta: dict
+    huellas: pd.Series
+    df_asig_idx: pd.DataFrame
+    asignado: pd.Series              # asignado por cuota, índice (MES, Codigo, Cliente)
+    optimizacion: Optional[pd.DataFrame] = None
+
+
+def _slug(texto: str) -> str:
+    return str(texto).strip().lower().replace(" ", "_").replace("/", "_") or CLAVE_POR_DEFECTO
+
+
+class AlmacenDelta:
+    """Última corrida de cada política bajo `clave` (p. ej. el país o el nombre del template)."""
+
+    def __init__(self, carpeta=CARPETA_ALMACEN, clave: str = CLAVE_POR_DEFECTO):
+        self.carpeta = Path(carpeta)
+        self.clave = clave
+
+    def _base(self, modo: str) -> Path:
+        return self.carpeta / _slug(self.clave) / _slug(modo)
+
+    @contextmanager
+    def bloqueo(self, modo: str):
+        """Exclusión entre corridas sobre la misma clave y política (cargar → calcular → guardar)."""
+        base = self._base(modo)
+        base.mkdir(parents=True, exist_ok=True)
+        ruta = (base / BLOQUEO).resolve()
+        with _BLOQUEOS_LOCK:
+            lock = _BLOQUEOS.setdefault(ruta, threading.RLock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            with open(ruta, "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _vigente(self, base: Path) -> Optional[str]:
+        try:
+            return json.loads((base / PUNTERO).read_text(encoding="utf-8"))["corrida"]
+        except (FileNotFoundError, KeyError, json.JSONDecodeError):
+            return None
+
+    def cargar(self, modo: str) -> Optional[CorridaGuardada]:
+        """Corrida vigente de `modo`, o None si no hay (o es de otra versión del almacén)."""
+        base = self._base(modo)
+        vigente = self._vigente(base)
+        if vigente is None:
+            return None
+        corrida = base / vigente
+        try:
+            meta = json.loads((corrida / "meta.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if meta.get("version") != VERSION_ALMACEN:
+            return None
+        huellas = pd.read_parquet(corrida / "huellas.parquet")
+        asignado = pd.read_parquet(corrida / "asignado.parquet")
+        optimizacion = corrida / "optimizacion.parquet"
+        return CorridaGuardada(
+            meta=meta,
+            huellas=pd.Series(
+                huellas["huella"].to_numpy(dtype=np.uint64),
+                index=pd.Index(huellas["Codigo"].to_numpy(dtype=object), name="Codigo"),
+                name="huella",
+            ),
+            df_asig_idx=pd.read_parquet(corrida / "asignacion.parquet").set_index(["MES", "Codigo"]),
+            asignado=asignado.set_index(["MES", "Codigo", "Cliente"])["Asignado"],
+            optimizacion=pd.read_parquet(optimizacion) if optimizacion.exists() else None,
+        )
+
+    def guardar(self, modo: str, meta: dict, huellas: pd.Series, resultado: ResultadoAsignacion) -> Path:
+        """
+        Escribe la corrida en una subcarpeta nueva y la marca como vigente. Conserva la que estaba
+        vigente (puede estar leyéndose) y borra las anteriores a esa.
+        """
+        base = self._base(modo)
+        previa = self._vigente(base)
+        nombre = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        corrida = base / nombre
+        corrida.mkdir(parents=True)
+        huellas.rename("huella").reset_index().to_parquet(corrida / "huellas.parquet", index=False)
+        resultado.df_asig_idx.reset_index().to_parquet(corrida / "asignacion.parquet", index=False)
+        resultado.df_min_metrics["Asignado"].reset_index().to_parquet(corrida / "asignado.parquet", index=False)
+        if resultado.optimizacion is not None:
+            resultado.optimizacion.to_parquet(corrida / "optimizacion.parquet", index=False)
+        (corrida / "meta.json").write_text(
+            json.dumps({"version": VERSION_ALMACEN, **meta}, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+        temporal = base / f"{PUNTERO}.{nombre}.tmp"
+        temporal.write_text(json.dumps({"corrida": nombre}), encoding="utf-8")
+        os.replace(temporal, base / PUNTERO)
+        for vieja in base.iterdir():
+            if vieja.is_dir() and vieja.name not in (nombre, previa):
+                shutil.rmtree(vieja, ignore_errors=True)
+        return corrida
+
+    def borrar(self, modo: str):
+        shutil.rmtree(self._base(modo), ignore_errors=True)
+
+
+# =========================
+# Ejecución delta
+# =========================
+def entradas_de_codigos(entradas: Entradas, codigos) -> Entradas:
+    """Las mismas entradas restringidas a `codigos` (la hoja de prioridades queda completa)."""
+    codigos = pd.Index(codigos)
+    return dataclasses.replace(
+        entradas,
+        df_stock=entradas.df_stock[entradas.df_stock["Codigo"].isin(codigos)],
+        df_min=entradas.df_min[entradas.df_min.index.get_level_values(1).isin(codigos)],
+        cod_validos=[c for c in entradas.cod_validos if c in codigos],
+    )
+
+
+def _unir(corrida: CorridaGuardada, reutilizados, parcial: ResultadoAsignacion, df_min_pos, columnas_asig) -> tuple:
+    """(df_asig_idx, asignado, optimizacion) de la corrida anterior (códigos reutilizados) + lo recalculado."""
+    previo = corrida.df_asig_idx[corrida.df_asig_idx.index.get_level_values(1).isin(reutilizados)]
+    partes = [df for df in (previo, parcial.df_asig_idx) if len(df)] or [previo]  # sin mezclar con vacíos (dtype object)
+    df_asig_idx = pd.concat(partes).sort_index()
+    df_asig_idx = df_asig_idx.astype({**{c: np.int64 for c in columnas_asig[:-1]}, "PUSH": np.float64})
+
+    asignado_previo = corrida.asignado[corrida.asignado.index.get_level_values(1).isin(reutilizados)]
+    asignado = pd.concat([asignado_previo, parcial.df_min_metrics["Asignado"]])
+    asignado = asignado.reindex(df_min_pos.index, fill_value=0).to_numpy(dtype=np.int64)
+
+    optimizacion = None
+    if parcial.optimizacion is not None:
+        partes = [parcial.optimizacion]
+        if corrida.optimizacion is not None:
+            partes.insert(0, corrida.optimizacion[corrida.optimizacion["Codigo"].isin(reutilizados)])
+        partes = [df for df in partes if len(df)] or [parcial.optimizacion]
+        optimizacion = pd.concat(partes).sort_values("Codigo", kind="stable", ignore_index=True)
+    return df_asig_idx, asignado, optimizacion
+
+
+def ejecutar_asignacion_delta(
+    entradas: Entradas,
+    modo: str = POLITICA_CONTINUO,
+    almacen: Optional[AlmacenDelta] = None,
+    vectorizado: bool = True,
+    procesos: int = 1,
+    diagnostico=None,
+    progreso=None,
+) -> ResultadoAsignacion:
+    """
+    Como `ejecutar_asignacion`, pero reutiliza del almacén los códigos sin cambios y guarda la
+    corrida nueva. `resultado.delta` informa códigos reutilizados / recalculados y el motivo.
+    Corridas concurrentes sobre la misma clave y política se ejecutan de a una (AlmacenDelta.bloqueo).
+    """
+    almacen = almacen or AlmacenDelta()
+    if progreso is not None:
+        progreso.iniciar("4.0) Delta: esperando otras corridas de la misma clave")
+    with almacen.bloqueo(modo):
+        return _ejecutar_delta(entradas, modo, almacen, vectorizado, procesos, diagnostico, progreso)
+
+
+def _ejecutar_delta(entradas, modo, almacen, vectorizado, procesos, diagnostico, progreso) -> ResultadoAsignacion:
+    if progreso is not None:
+        progreso.iniciar("4.0) Delta: huellas y corrida anterior")
+    with etapa(diagnostico, "4.0) Delta: huellas y corrida anterior") as registro:
+        df_min_pos, meses, mes_final, columnas_asig = definir_horizonte(entradas)
+        huellas = huellas_por_codigo(entradas)
+        globales = huellas_globales(entradas, modo, meses, mes_final, columnas_asig)
+        corrida = almacen.cargar(modo)
+        registro["filas"] = len(huellas)
+
+    if corrida is None:
+        motivo = MOTIVO_SIN_PREVIA
+    elif corrida.meta.get("huellas_globales", {}).get("prioridad") != globales["prioridad"]:
+        motivo = MOTIVO_PRIORIDAD
+    elif corrida.meta.get("huellas_globales", {}).get("horizonte") != globales["horizonte"]:
+        motivo = MOTIVO_HORIZONTE
+    else:
+        motivo = MOTIVO_DELTA
+
+    opciones = dict(vectorizado=vectorizado, procesos=procesos, diagnostico=diagnostico, progreso=progreso)
+    if motivo != MOTIVO_DELTA:
+        resultado = ejecutar_asignacion(entradas, modo, **opciones)
+        reutilizados = pd.Index([], dtype=object)
+        eliminados = 0
+    else:
+        previas = corrida.huellas
+        comunes = huellas.index.intersection(previas.index)
+        reutilizados = comunes[huellas[comunes].to_numpy() == previas[comunes].to_numpy()]
+        cambiados = huellas.index.difference(reutilizados)
+        eliminados = len(previas.index.difference(huellas.index))
+        parcial = ejecutar_asignacion(
+            entradas_de_codigos(entradas, cambiados), modo, horizonte=(meses, mes_final, columnas_asig), **opciones
+        )
+        with etapa(diagnostico, "6.1) Delta: unión con la corrida anterior") as registro:
+            df_asig_idx, asignado, optimizacion = _unir(corrida, reutilizados, parcial, df_min_pos, columnas_asig)
+            resultado = ResultadoAsignacion(
+                modo=modo,
+                df_asig_idx=df_asig_idx,
+                df_min_metrics=metricas_minimos(df_min_pos, asignado),
+                columnas_asig=columnas_asig,
+                optimizacion=optimizacion,
+                contadores=parcial.contadores,
+            )
+            registro["filas"] = len(df_asig_idx)
+
+    resultado.delta = {
+        "motivo": motivo,
+        "codigos": len(huellas),
+        "reutilizados": len(reutilizados),
+        "recalculados": len(huellas) - len(reutilizados),
+        "eliminados": eliminados,
+    }
+    if progreso is not None:
+        progreso.iniciar("6.2) Delta: guardado")
+    with etapa(diagnostico, "6.2) Delta: guardado", **resultado.delta) as registro:
+        meta = {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "politica": modo,
+            "huellas_globales": globales,
+            "codigos": len(huellas),
+        }
+        registro["carpeta"] = str(almacen.guardar(modo, meta, huellas, resultado))
+    return resultado
@@ -0,0 +1,120 @@
+# =========================================================
+# PIAS — Diagnóstico de corridas (tiempos, memoria, filas y contadores)
+# Cada etapa numerada del pipeline (3.1 carga, 3.2-3.4 normalización, 4 preparación, 5 motor,
+# 6 métricas, 7 exportación, 8 gráficos) se registra con:
+#   - segundos de reloj
+#   - rss_inicio_mb / rss_fin_mb / rss_delta_mb: memoria residente del proceso al empezar y al terminar
+#     la etapa, y su diferencia (lo que la etapa dejó retenido; Linux, /proc/self/statm)
+#   - rss_pico_proceso_mb: pico de RSS de TODO el proceso desde que arrancó (ru_maxrss), no de la
+#     etapa: solo sube en la etapa que fija un pico nuevo y en corridas repetidas arrastra las anteriores
+#   - pico_mb: pico propio de la etapa con tracemalloc (solo con memoria=True: encarece la corrida;
+#     no ve la memoria nativa de calamine / pyarrow, que sí aparece en el RSS)
+#   - filas y datos extra que informe la etapa
+# Los contadores de los loops del motor (cuotas visitadas, consultas de pendientes, ...) se suman aparte.
+# El reporte es un dict serializable a JSON para seguir las corridas en el tiempo.
+# =========================================================
+import json
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+import pandas as pd
+
+try:  # no existe en Windows: ahí se omite el pico de RSS
+    import resource
+except ImportError:
+    resource = None
+
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso en MB (Linux; None si la plataforma no la informa)."""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def rss_pico_proceso_mb():
+    """Pico de memoria residente del proceso desde que arrancó, en MB (None si la plataforma no lo informa)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 2**20 if platform.system() == "Darwin" else pico / 2**10  # macOS: bytes; Linux: KB
+
+
+class Diagnostico:
+    """Registro de etapas y contadores de una corrida."""
+
+    def __init__(self, memoria: bool = False):
+        self.memoria = memoria
+        self.etapas = []
+        self.contadores = {}
+
+    @contextmanager
+    def etapa(self, nombre: str, **datos):
+        """
+        Mide el bloque como una etapa. Devuelve un dict donde la etapa puede completar
+        datos al terminar (p. ej. registro["filas"] = len(df)).
+        """
+        registro = {"etapa": nombre, **datos}
+        trazar = self.memoria and not tracemalloc.is_tracing()
+        if trazar:
+            tracemalloc.start()
+        if self.memoria:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+        rss_inicio = rss_actual_mb()
+        t0 = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro["segundos"] = time.perf_counter() - t0
+            if self.memoria:
+                registro["pico_mb"] = (tracemalloc.get_traced_memory()[1] - base) / 2**20
+            if trazar:
+                tracemalloc.stop()
+            rss_fin = rss_actual_mb()
+            registro["rss_inicio_mb"] = rss_inicio
+            registro["rss_fin_mb"] = rss_fin
+            registro["rss_delta_mb"] = rss_fin - rss_inicio if rss_fin is not None and rss_inicio is not None else None
+            registro["rss_pico_proceso_mb"] = rss_pico_proceso_mb()
+            self.etapas.append(registro)
+
+    def sumar_contadores(self, contadores: dict):
+        for clave, valor in contadores.items():
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def extender(self, otro: "Diagnostico"):
+        """Agrega etapas y contadores de otro diagnóstico (p. ej. uno guardado en caché)."""
+        self.etapas.extend(otro.etapas)
+        self.sumar_contadores(otro.contadores)
+
+    def tabla(self) -> pd.DataFrame:
+        """Una fila por etapa (para mostrar en la app)."""
+        return pd.DataFrame(self.etapas).set_index("etapa") if self.etapas else pd.DataFrame()
+
+    def reporte(self, **metadatos) -> dict:
+        return {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            **metadatos,
+            "segundos_total": sum(e["segundos"] for e in self.etapas),
+            "etapas": self.etapas,
+            "contadores": self.contadores,
+        }
+
+    def a_json(self, **metadatos) -> str:
+        return json.dumps(self.reporte(**metadatos), indent=2, ensure_ascii=False, default=str)
+
+
+def etapa(diagnostico, nombre: str, **datos):
+    """`diagnostico.etapa(...)` o un contexto vacío si no se pidió diagnóstico."""
+    if diagnostico is None:
+        return nullcontext({})
+    return diagnostico.etapa(nombre, **datos)
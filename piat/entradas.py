@@ -0,0 +1,204 @@
+# =========================================================
+# PIAS — Carga y normalización de entradas
+# Lee las tres hojas del template y las deja listas para el motor:
+# - Stock Disponible      → MES, Codigo, Stock Disponible (solo > 0)
+# - Prioridad Clientes    → índice Cliente; primera columna = prioridad
+# - Mínimos de Asignación → índice (MES, Codigo, Cliente); columna Minimo
+#
+# Orígenes aceptados:
+# - Excel (.xlsx): el libro se abre UNA vez y se leen las tres hojas; con python-calamine
+#   instalado se usa ese backend (mucho más rápido), si no openpyxl en modo solo lectura.
+# - Carpeta con las tres tablas en CSV o Parquet (extracciones del ERP, sin Excel):
+#   stock_disponible.*, prioridad_clientes.*, minimos_asignacion.* con las mismas columnas que las hojas.
+# =========================================================
+import importlib.util
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from .diagnostico import etapa
+
+HOJA_STOCK = "Stock Disponible"
+HOJA_PRIORIDAD = "Prioridad Clientes"
+HOJA_MINIMOS = "Mínimos de Asignación"
+
+# Nombre de archivo (sin extensión) de cada tabla cuando la entrada es una carpeta CSV/Parquet
+ARCHIVOS_TABLAS = {
+    HOJA_STOCK: "stock_disponible",
+    HOJA_PRIORIDAD: "prioridad_clientes",
+    HOJA_MINIMOS: "minimos_asignacion",
+}
+EXTENSIONES_TABLAS = (".parquet", ".csv")
+
+
+# =========================
+# Helpers
+# =========================
+def _texto_normalizado(valores) -> pd.Index:
+    """
+    Equivalente vectorizado de `str(x.strip() if isinstance(x, str) else x)` elemento a elemento.
+    Se convierte a str antes de agrupar: 102 y 102.0 (o 1 y True) siguen siendo "102", "102.0", "1", "True".
+    """
+    return pd.Index(pd.Series(valores, dtype=object).astype(str).str.strip(), dtype=object)
+
+def _safe_int(x, default=0):
+    try:
+        return int(x)
+    except Exception:
+        try:
+            return int(float(x))
+        except Exception:
+            return default
+
+
+@dataclass
+class Entradas:
+    """Tablas normalizadas que consume el motor."""
+    df_stock: pd.DataFrame
+    df_prior: pd.DataFrame
+    df_min: pd.DataFrame
+    prioridad_series: pd.Series
+    clientes_por_prioridad: list
+    cod_validos: list
+
+
+# =========================
+# 3.1) Carga de hojas / tablas
+# =========================
+def motor_excel() -> str:
+    """Backend de lectura de Excel: calamine si está instalado, si no openpyxl (solo lectura)."""
+    return "calamine" if importlib.util.find_spec("python_calamine") is not None else "openpyxl"
+
+
+def leer_excel(origen, motor=None):
+    """
+    Lee las tres hojas del template (ruta, bytes-like o archivo subido). Devuelve tablas crudas.
+    El libro se abre una sola vez (pd.ExcelFile) en lugar de re-parsear el zip por hoja.
+    """
+    with pd.ExcelFile(origen, engine=motor or motor_excel()) as libro:
+        df_stock = libro.parse(HOJA_STOCK)
+        df_prior = libro.parse(HOJA_PRIORIDAD, index_col=0)
+        df_min   = libro.parse(HOJA_MINIMOS, index_col=[0, 1, 2])
+    return df_stock, df_prior, df_min
+
+
+def _leer_tabla(ruta: Path, n_indice: int) -> pd.DataFrame:
+    """Lee una tabla CSV/Parquet y deja las primeras `n_indice` columnas como índice (igual que las hojas)."""
+    if ruta.suffix.lower() == ".parquet":
+        df = pd.read_parquet(ruta)
+    else:
+        # Todo como texto: conserva códigos con ceros a la izquierda; la normalización convierte los números
+        df = pd.read_csv(ruta, dtype=str)
+    if n_indice:
+        df = df.set_index(list(df.columns[:n_indice]))
+    return df
+
+
+def buscar_tablas(carpeta) -> dict:
+    """Rutas de las tres tablas dentro de `carpeta` (por hoja). Lanza ValueError si falta alguna."""
+    carpeta = Path(carpeta)
+    rutas, faltan = {}, []
+    for hoja, nombre in ARCHIVOS_TABLAS.items():
+        candidatas = [carpeta / f"{nombre}{ext}" for ext in EXTENSIONES_TABLAS if (carpeta / f"{nombre}{ext}").is_file()]
+        if candidatas:
+            rutas[hoja] = candidatas[0]
+        else:
+            faltan.append(f"{nombre}{{{','.join(EXTENSIONES_TABLAS)}}}")
+    if faltan:
+        raise ValueError(f"La carpeta '{carpeta}' no contiene las tablas: {', '.join(faltan)}")
+    return rutas
+
+
+def es_carpeta_tablas(ruta) -> bool:
+    ruta = Path(ruta)
+    if not ruta.is_dir():
+        return False
+    try:
+        buscar_tablas(ruta)
+    except ValueError:
+        return False
+    return True
+
+
+def leer_tablas(carpeta):
+    """Lee stock_disponible / prioridad_clientes / minimos_asignacion (CSV o Parquet). Devuelve tablas crudas."""
+    rutas = buscar_tablas(carpeta)
+    df_stock = _leer_tabla(rutas[HOJA_STOCK], 0)
+    df_prior = _leer_tabla(rutas[HOJA_PRIORIDAD], 1)
+    df_min   = _leer_tabla(rutas[HOJA_MINIMOS], 3)
+    return df_stock, df_prior, df_min
+
+
+def leer_entradas(origen):
+    """Tablas crudas desde un Excel (ruta o buffer) o desde una carpeta de tablas CSV/Parquet."""
+    if isinstance(origen, (str, Path)) and Path(origen).is_dir():
+        return leer_tablas(origen)
+    return leer_excel(origen)
+
+
+# =========================
+# 3.2 / 3.3 / 3.4) Limpieza y consolidación
+# =========================
+def normalizar_entradas(df_stock, df_prior, df_min) -> Entradas:
+    """Valida y normaliza las tablas crudas. Lanza ValueError si falta estructura."""
+    # --- 3.2 Limpieza mínima ---
+    df_stock = df_stock.copy()
+    df_stock.columns = [c.strip() for c in df_stock.columns]
+    requeridas_stock = {"MES", "Codigo", "Stock Disponible"}
+    if not requeridas_stock.issubset(df_stock.columns):
+        faltan = requeridas_stock - set(df_stock.columns)
+        raise ValueError(f"La hoja 'Stock Disponible' debe contener las columnas: {', '.join(requeridas_stock)}. Faltan: {', '.join(faltan)}")
+
+    # Stock
+    df_stock["Codigo"] = _texto_normalizado(df_stock["Codigo"])
+    df_stock["MES"] = pd.to_numeric(df_stock["MES"], errors="coerce").fillna(1).astype(int)
+    df_stock["Stock Disponible"] = pd.to_numeric(df_stock["Stock Disponible"], errors="coerce").fillna(0)
+    df_stock = df_stock[df_stock["Stock Disponible"] > 0].copy()
+
+    # Prioridades
+    if df_prior.shape[1] < 1:
+        raise ValueError("La hoja 'Prioridad Clientes' debe tener al menos una columna con el valor de prioridad.")
+    prioridad_series = pd.to_numeric(df_prior.iloc[:, 0], errors="coerce").fillna(5).astype(int)
+    prioridad_series.index = _texto_normalizado(prioridad_series.index)
+    clientes_por_prioridad = prioridad_series.sort_values().index.tolist()
+
+    # --- 3.3 Mínimos → conservar MES original y consolidar ---
+    df_min = df_min.reset_index()
+    df_min.columns = ["MES", "Codigo", "Cliente", "Minimo"]
+    if "Minimo" not in df_min.columns:
+        raise ValueError("La hoja 'Mínimos de Asignación' debe incluir la columna 'Minimo'.")
+    df_min["MES"] = pd.to_numeric(df_min["MES"], errors="coerce").fillna(1).astype(int)
+    df_min["Codigo"] = _texto_normalizado(df_min["Codigo"])
+    df_min["Cliente"] = _texto_normalizado(df_min["Cliente"])
+    df_min["Minimo"] = pd.to_numeric(df_min["Minimo"], errors="coerce").fillna(0).astype(int)
+    df_min = (
+        df_min.groupby(["MES", "Codigo", "Cliente"], as_index=True)["Minimo"]
+        .sum()
+        .to_frame()
+    )
+
+    # --- 3.4 Intersección de códigos válidos ---
+    cod_min = set(df_min.index.get_level_values(1))
+    cod_stk = set(df_stock["Codigo"])
+    cod_validos = sorted(cod_min & cod_stk)
+
+    return Entradas(
+        df_stock=df_stock,
+        df_prior=df_prior,
+        df_min=df_min,
+        prioridad_series=prioridad_series,
+        clientes_por_prioridad=clientes_por_prioridad,
+        cod_validos=cod_validos,
+    )
+
+
+def cargar_entradas(origen, diagnostico=None) -> Entradas:
+    """Atajo: lee el Excel (o la carpeta de tablas CSV/Parquet) y normaliza (etapas 3.1 y 3.2-3.4)."""
+    with etapa(diagnostico, "3.1) Carga") as registro:
+        tablas = leer_entradas(origen)
+        registro["filas"] = sum(len(df) for df in tablas)
+    with etapa(diagnostico, "3.2-3.4) Normalización") as registro:
+        entradas = normalizar_entradas(*tablas)
+        registro["filas"] = len(entradas.df_min)
+    return entradas
@@ -0,0 +1,69 @@
+# =========================================================
+# PIAS — Gráficos de resultados (sección 8 de la app)
+# Separado del motor: importa matplotlib/seaborn y no se re-exporta en `piat`.
+# Lo usan la app (st.pyplot) y el benchmark por etapas.
+# =========================================================
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+
+def datos_graficos(df_asig_idx: pd.DataFrame):
+    """
+    Series de los tres gráficos:
+    - res_plot: total asignado por cliente (descendente)
+    - df_mes:   total asignado por MES (suma de clientes)
+    - df_push:  PUSH por MES
+    """
+    if "PUSH" in df_asig_idx.columns:
+        df_asig_long = df_asig_idx.drop(columns=["PUSH"]).stack().reset_index()
+    else:
+        df_asig_long = df_asig_idx.stack().reset_index()
+    df_asig_long.columns = ["MES", "Codigo", "Cliente", "Asignado"]
+    res_plot = df_asig_long.groupby("Cliente")["Asignado"].sum().sort_values(ascending=False)
+
+    if "PUSH" in df_asig_idx.columns:
+        df_mes = (
+            df_asig_idx.drop(columns=["PUSH"]).sum(axis=1).reset_index()
+            .groupby("MES")[0].sum().reset_index()
+        )
+    else:
+        df_mes = (
+            df_asig_idx.sum(axis=1).reset_index()
+            .groupby("MES")[0].sum().reset_index()
+        )
+    df_mes.columns = ["MES", "Asignado"]
+
+    if "PUSH" in df_asig_idx.columns:
+        df_push = df_asig_idx["PUSH"].groupby(level=0).sum().reset_index()
+        df_push.columns = ["MES", "PUSH"]
+    else:
+        df_push = pd.DataFrame({"MES": [], "PUSH": []})
+    return res_plot, df_mes, df_push
+
+
+def figuras(df_asig_idx: pd.DataFrame):
+    """(fig_clientes, fig_mes, fig_push); cada una es None si no hay datos para graficar."""
+    res_plot, df_mes, df_push = datos_graficos(df_asig_idx)
+
+    fig1 = None
+    if len(res_plot) > 0:
+        fig1, ax1 = plt.subplots(figsize=(10, 4))
+        sns.barplot(x=res_plot.index, y=res_plot.values, ax=ax1)
+        ax1.set_title("Total Asignado por Cliente")
+        ax1.set_ylabel("Unidades")
+        ax1.set_xlabel("Cliente")
+        ax1.tick_params(axis="x", rotation=45)
+
+    fig2 = None
+    if df_mes.shape[0] > 0:
+        fig2, ax2 = plt.subplots(figsize=(8, 4))
+        sns.barplot(data=df_mes, x="MES", y="Asignado", ax=ax2)
+        ax2.set_title("Total Asignado por Mes")
+
+    fig3 = None
+    if df_push.shape[0] > 0:
+        fig3, ax3 = plt.subplots(figsize=(8, 4))
+        sns.barplot(data=df_push, x="MES", y="PUSH", ax=ax3)
+        ax3.set_title("PUSH por Mes")
+    return fig1, fig2, fig3
@@ -0,0 +1,140 @@
+# =========================================================
+# PIAS — Índices precalculados para los motores
+# StockPorMes: llegadas de stock agrupadas UNA sola vez por (MES, Codigo),
+# en formato CSR por mes (filas del mes i en [inicio[i], inicio[i+1])).
+# Reemplaza el filtro + groupby de df_stock que se hacía en cada mes.
+# CuotasCompactas: cuotas de mínimos como arrays paralelos de enteros (ver abajo).
+#
+# Modelo compacto: cada Codigo se identifica por su posición en `etiquetas` (únicos,
+# ordenados: el orden de los ids es el de las etiquetas) y cada Cliente por su posición
+# en columnas_asig (= prioridad). Los motores trabajan solo con estos ids; las etiquetas
+# se recuperan al armar la salida (AcumuladorSalida / a_dataframe).
+# =========================================================
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class StockPorMes:
+    meses: np.ndarray       # meses con llegadas, ordenados
+    inicio: np.ndarray      # offsets por mes (len = len(meses) + 1)
+    codigos: np.ndarray     # id de código (int32, posición en `etiquetas`) de cada fila, ordenado dentro del mes
+    cantidades: np.ndarray  # suma de "Stock Disponible" por (MES, Codigo)
+
+    @classmethod
+    def desde_df(cls, df_stock: pd.DataFrame, etiquetas: np.ndarray) -> "StockPorMes":
+        agrupado = df_stock.groupby(["MES", "Codigo"], sort=True)["Stock Disponible"].sum()
+        mes_fila = agrupado.index.get_level_values(0).to_numpy()
+        meses, inicio = np.unique(mes_fila, return_index=True)
+        return cls(
+            meses=meses,
+            inicio=np.append(inicio, len(mes_fila)),
+            codigos=ids_codigo(etiquetas, agrupado.index.get_level_values(1)),
+            cantidades=agrupado.to_numpy(),
+        )
+
+    def _rango(self, mes):
+        i = np.searchsorted(self.meses, mes)
+        if i >= len(self.meses) or self.meses[i] != mes:
+            return 0, 0
+        return self.inicio[i], self.inicio[i + 1]
+
+    def del_mes(self, mes) -> list:
+        """Pares (codigo, cantidad) con llegada en `mes`, ordenados por código."""
+        a, b = self._rango(mes)
+        return list(zip(self.codigos[a:b].tolist(), self.cantidades[a:b].tolist()))
+
+
+def etiquetas_codigo(df_stock: pd.DataFrame) -> np.ndarray:
+    """Códigos únicos y ordenados del stock: el id de un código es su posición en este array."""
+    return np.unique(df_stock["Codigo"].to_numpy(dtype=object))
+
+
+def ids_codigo(etiquetas: np.ndarray, codigos) -> np.ndarray:
+    """Id (int32) de cada código de `codigos`; todos deben estar en `etiquetas`."""
+    ids = pd.Index(etiquetas).get_indexer(pd.Index(codigos))
+    if len(ids) and ids.min() < 0:
+        raise ValueError("Hay códigos sin id (no están en las etiquetas de stock)")
+    return ids.astype(np.int32)
+
+
+class CuotasCompactas:
+    """
+    Cuotas de mínimos (filas de df_min_pos) como arrays paralelos de enteros, ordenadas por
+    (id de código, prioridad del cliente, MES) — el orden FIFO que recorren los motores:
+      - fila, mes, cliente, minimo, asignado: una posición por cuota
+      - grupos (código, cliente) en CSR: cuotas del grupo g en [grupo_inicio[g], grupo_inicio[g + 1]),
+        grupos del código c en [codigo_grupos[c], codigo_grupos[c + 1])
+      - pendiente y ultimo_mes por id de código (ultimo_mes = SIN_MINIMOS si el código no tiene cuotas)
+    Reemplaza los dicts con claves (MES, Codigo, Cliente) y las listas de tuplas por (Codigo, Cliente).
+    """
+    __slots__ = (
+        "fila", "mes", "cliente", "minimo", "asignado",
+        "grupo_inicio", "grupo_cliente", "codigo_grupos",
+        "pendiente", "ultimo_mes",
+    )
+    SIN_MINIMOS = np.iinfo(np.int64).min
+
+    def __init__(self, fila, mes, cliente, minimo, grupo_inicio, grupo_cliente, codigo_grupos, pendiente, ultimo_mes):
+        self.fila = fila
+        self.mes = mes
+        self.cliente = cliente
+        self.minimo = minimo
+        self.asignado = np.zeros(len(fila), dtype=np.int64)
+        self.grupo_inicio = grupo_inicio
+        self.grupo_cliente = grupo_cliente
+        self.codigo_grupos = codigo_grupos
+        self.pendiente = pendiente
+        self.ultimo_mes = ultimo_mes
+
+    def __len__(self):
+        return len(self.fila)
+
+    @classmethod
+    def desde_df(cls, df_min_pos: pd.DataFrame, etiquetas: np.ndarray, clientes: list) -> "CuotasCompactas":
+        """`clientes` = columnas de salida sin PUSH (orden de prioridad)."""
+        n_cod = len(etiquetas)
+        mes = df_min_pos.index.get_level_values(0).to_numpy(dtype=np.int64)
+        cod = ids_codigo(etiquetas, df_min_pos.index.get_level_values(1))
+        cli = pd.Index(clientes).get_indexer(df_min_pos.index.get_level_values(2)).astype(np.int32)
+        minimo = np.trunc(df_min_pos["Minimo"].to_numpy(dtype=np.float64)).astype(np.int64)
+
+        orden = np.lexsort((mes, cli, cod))
+        cod_o, cli_o = cod[orden], cli[orden]
+        nuevo_grupo = np.r_[True, (cod_o[1:] != cod_o[:-1]) | (cli_o[1:] != cli_o[:-1])] if len(orden) else np.zeros(0, dtype=bool)
+        inicio = np.flatnonzero(nuevo_grupo)
+
+        pendiente = np.zeros(n_cod, dtype=np.int64)
+        np.add.at(pendiente, cod, np.maximum(minimo, 0))
+        ultimo_mes = np.full(n_cod, cls.SIN_MINIMOS, dtype=np.int64)
+        np.maximum.at(ultimo_mes, cod, mes)
+        return cls(
+            fila=orden.astype(np.int64),
+            mes=mes[orden],
+            cliente=cli_o,
+            minimo=minimo[orden],
+            grupo_inicio=np.append(inicio, len(orden)).astype(np.int64),
+            grupo_cliente=cli_o[inicio],
+            codigo_grupos=np.searchsorted(cod_o[inicio], np.arange(n_cod + 1)).astype(np.int64),
+            pendiente=pendiente,
+            ultimo_mes=ultimo_mes,
+        )
+
+    def codigo_por_cuota(self) -> np.ndarray:
+        """Id de código de cada cuota (expandido desde el CSR de grupos)."""
+        n_cod = len(self.codigo_grupos) - 1
+        return np.repeat(np.repeat(np.arange(n_cod), np.diff(self.codigo_grupos)), np.diff(self.grupo_inicio))
+
+    def asignado_por_fila(self) -> np.ndarray:
+        """Asignado alineado con las filas de df_min_pos."""
+        asignado = np.zeros(len(self.fila), dtype=np.int64)
+        asignado[self.fila] = self.asignado
+        return asignado
+
+    def restaurar_asignado(self, asignado_por_fila: np.ndarray):
+        """Retoma el asignado de una corrida anterior (alineado con df_min_pos) y recalcula el pendiente por código."""
+        self.asignado[:] = asignado_por_fila[self.fila]
+        self.pendiente[:] = 0
+        np.add.at(self.pendiente, self.codigo_por_cuota(), np.maximum(self.minimo - self.asignado, 0))
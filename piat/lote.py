@@ -0,0 +1,259 @@
+# =========================================================
+# PIAS — Modo lote (línea de comandos)
+# Procesa una carpeta de templates (.xlsx) y/o de subcarpetas con tablas CSV/Parquet
+# (stock_disponible, prioridad_clientes, minimos_asignacion) sin levantar Streamlit:
+#   python -m piat <carpeta> [--politica Continuo|"Solo en un mes"|Óptimo|ambas|todas] [--salida <carpeta>] [--procesos N]
+# Por cada archivo escribe <nombre>_asignacion_<politica>.xlsx con las mismas hojas que la app
+# (--formato-asignacion largo: hoja de asignación en forma larga, solo cantidades > 0;
+#  --formato-salida: xlsx, xlsx_stream o paquete .zip Parquet/CSV; --sin-entradas: omite Stock/Prioridad;
+#  --reporte-json: además <nombre>_diagnostico_<politica>.json con tiempos, memoria y contadores por etapa;
+#  --memoria: el reporte incluye el pico de cada etapa con tracemalloc (implica --reporte-json, más lento);
+#  --delta <carpeta>: recalcula solo los códigos que cambiaron respecto de la corrida anterior del mismo
+#  template (clave = nombre del archivo o --clave-delta), ver piat.delta;
+#  --estado <archivo.zip|carpeta> / --mes-cierre N: horizonte móvil de Continuo, retoma el estado de cierre
+#  anterior y/o escribe <nombre>_estado_cierre_<N>.zip, ver piat.cierre. Un archivo de estado solo sirve
+#  para una entrada; con una carpeta, cada template retoma su propio <nombre>_estado_cierre_<N>.zip
+#  (el de N mayor) y falla si no lo hay. --clave-estado: clave del template guardada en el estado).
+# =========================================================
+import argparse
+import re
+import time
+from pathlib import Path
+
+from .cierre import EstadoContinuo, ejecutar_continuo_rodante
+from .delta import AlmacenDelta, ejecutar_asignacion_delta
+from .diagnostico import Diagnostico, etapa
+from .entradas import cargar_entradas, es_carpeta_tablas
+from .motor import POLITICA_CONTINUO, POLITICA_SOLO_MES, POLITICAS, ejecutar_asignacion
+from .salida import EXTENSION_SALIDA, FORMATOS_ASIGNACION, FORMATOS_SALIDA, escribir_salida
+
+
+def _slug(politica: str) -> str:
+    return politica.lower().replace(" ", "_")
+
+
+def procesar_archivo(
+    ruta: Path,
+    politicas,
+    carpeta_salida: Path,
+    procesos: int = 1,
+    formato_asignacion: str = "ancho",
+    formato_salida: str = "xlsx",
+    incluir_entradas: bool = True,
+    reporte_json: bool = False,
+    memoria: bool = False,
+    almacen_delta: AlmacenDelta = None,
+    estado: EstadoContinuo = None,
+    mes_cierre: int = None,
+    clave_estado: str = None,
+) -> list:
+    """
+    Corre cada política sobre un template (o carpeta de tablas) y devuelve las rutas escritas.
+    Con `almacen_delta` reutiliza los códigos sin cambios de la corrida anterior (piat.delta).
+    Con `estado` y/o `mes_cierre`, "Continuo" corre en horizonte móvil (piat.cierre); el estado debe
+    ser del mismo template (`clave_estado`, por defecto el nombre del archivo sin extensión).
+    Con `memoria`, el reporte JSON mide el pico de cada etapa con tracemalloc (piat.diagnostico).
+    """
+    rodante = estado is not None or mes_cierre is not None
+    reporte_json = reporte_json or memoria
+    diag_carga = Diagnostico(memoria) if reporte_json else None
+    entradas = cargar_entradas(ruta, diag_carga)
+    escritos = []
+    for politica in politicas:
+        diagnostico = None
+        if reporte_json:
+            diagnostico = Diagnostico(memoria)
+            diagnostico.extender(diag_carga)
+        if rodante and politica == POLITICA_CONTINUO:
+            resultado, estado_nuevo = ejecutar_continuo_rodante(
+                entradas, estado, mes_cierre, diagnostico=diagnostico, clave=clave_estado or ruta.stem
+            )
+            print(
+                f"   🗓️ {politica}: {resultado.contadores['meses_cerrados']} meses cerrados conservados, "
+                f"{resultado.contadores['meses_procesados']} procesados"
+            )
+            if estado_nuevo is not None:
+                escritos.append(estado_nuevo.guardar(carpeta_salida / f"{ruta.stem}_estado_cierre_{mes_cierre}.zip"))
+        elif almacen_delta is not None:
+            resultado = ejecutar_asignacion_delta(entradas, politica, almacen_delta, procesos=procesos, diagnostico=diagnostico)
+            info = resultado.delta
+            print(f"   ♻️ {politica}: {info['reutilizados']:,}/{info['codigos']:,} códigos reutilizados ({info['motivo']})")
+        else:
+            resultado = ejecutar_asignacion(entradas, politica, procesos=procesos, diagnostico=diagnostico)
+        destino = carpeta_salida / f"{ruta.stem}_asignacion_{_slug(politica)}{EXTENSION_SALIDA[formato_salida]}"
+        with etapa(diagnostico, f"7) Exportación ({formato_salida})"):
+            escribir_salida(destino, resultado, entradas, formato_salida, formato_asignacion, incluir_entradas)
+        escritos.append(destino)
+        if reporte_json:
+            reporte = carpeta_salida / f"{ruta.stem}_diagnostico_{_slug(politica)}.json"
+            reporte.write_text(
+                diagnostico.a_json(archivo=ruta.name, politica=politica, procesos=procesos, formato=formato_salida),
+                encoding="utf-8",
+            )
+            escritos.append(reporte)
+    return escritos
+
+
+def buscar_estado(origen: Path, ruta: Path) -> EstadoContinuo:
+    """
+    Estado de cierre para el template `ruta`: `origen` si es un archivo o, si es una carpeta,
+    su <nombre>_estado_cierre_<N>.zip de N mayor. Lanza FileNotFoundError si no hay ninguno.
+    """
+    if origen.is_dir():
+        patron = re.compile(rf"{re.escape(ruta.stem)}_estado_cierre_(\d+)")
+        candidatos = {
+            int(m.group(1)): p
+            for p in origen.glob("*_estado_cierre_*.zip")
+            if (m := patron.fullmatch(p.stem))
+        }
+        if not candidatos:
+            raise FileNotFoundError(f"No hay estado de cierre {ruta.stem}_estado_cierre_<N>.zip en {origen}")
+        origen = candidatos[max(candidatos)]
+    return EstadoContinuo.cargar(origen)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m piat",
+        description="Asignación PIAS en lote sobre una carpeta de templates Excel.",
+    )
+    parser.add_argument(
+        "carpeta",
+        type=Path,
+        help="Carpeta con templates .xlsx y/o subcarpetas de tablas CSV/Parquet (o un template/carpeta de tablas puntual).",
+    )
+    parser.add_argument(
+        "--politica",
+        choices=[*POLITICAS, "ambas", "todas"],
+        default=POLITICA_CONTINUO,
+        help="Política de mínimos a aplicar (por defecto: Continuo; ambas = las dos greedy; todas = incluye Óptimo).",
+    )
+    parser.add_argument("--salida", type=Path, default=None, help="Carpeta de salida (por defecto: la misma de entrada).")
+    parser.add_argument("--patron", default="*.xlsx", help="Patrón de archivos dentro de la carpeta (por defecto: *.xlsx).")
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=1,
+        help="Procesos para 'Continuo'/'Óptimo' repartidos por códigos (0 = todos los núcleos; por defecto: 1, serial).",
+    )
+    parser.add_argument(
+        "--formato-asignacion",
+        choices=FORMATOS_ASIGNACION,
+        default="ancho",
+        help="Hoja 'Asignación Óptima' ancha (una columna por cliente) o larga (solo cantidades > 0).",
+    )
+    parser.add_argument(
+        "--formato-salida",
+        choices=FORMATOS_SALIDA,
+        default="xlsx",
+        help="xlsx (histórico), xlsx_stream (memoria acotada) o paquete .zip con Parquet/CSV.",
+    )
+    parser.add_argument(
+        "--sin-entradas",
+        action="store_true",
+        help="No re-exportar las hojas de entrada sin cambios (Stock Disponible / Prioridad Clientes).",
+    )
+    parser.add_argument(
+        "--reporte-json",
+        action="store_true",
+        help="Escribir un reporte JSON por archivo y política con tiempos, memoria y contadores por etapa.",
+    )
+    parser.add_argument(
+        "--memoria",
+        action="store_true",
+        help="En el reporte JSON, medir el pico de memoria de cada etapa con tracemalloc (implica --reporte-json; más lento).",
+    )
+    parser.add_argument(
+        "--delta",
+        type=Path,
+        default=None,
+        metavar="CARPETA",
+        help="Almacén de la corrida anterior: recalcula solo los códigos con entradas modificadas y lo actualiza.",
+    )
+    parser.add_argument(
+        "--clave-delta",
+        default=None,
+        help="Clave de la corrida anterior en el almacén (por defecto: el nombre del archivo sin extensión).",
+    )
+    parser.add_argument(
+        "--estado",
+        type=Path,
+        default=None,
+        metavar="ARCHIVO|CARPETA",
+        help=(
+            "Estado de cierre de una corrida anterior: Continuo procesa solo los meses posteriores al cierre. "
+            "Un .zip solo con una entrada; con una carpeta, cada template usa su <nombre>_estado_cierre_<N>.zip."
+        ),
+    )
+    parser.add_argument(
+        "--clave-estado",
+        default=None,
+        help="Clave del template en el estado de cierre (por defecto: el nombre del archivo sin extensión; solo con una entrada).",
+    )
+    parser.add_argument(
+        "--mes-cierre",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Guardar el estado de Continuo al terminar el mes N en <nombre>_estado_cierre_<N>.zip.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.politica == "todas":
+        politicas = list(POLITICAS)
+    elif args.politica == "ambas":
+        politicas = [POLITICA_SOLO_MES, POLITICA_CONTINUO]
+    else:
+        politicas = [args.politica]
+
+    if args.carpeta.is_file() or es_carpeta_tablas(args.carpeta):
+        archivos = [args.carpeta]
+        base = args.carpeta.parent
+    else:
+        archivos = sorted(
+            p for p in args.carpeta.glob(args.patron)
+            if not p.name.startswith("~$") and "_asignacion_" not in p.stem
+        )
+        archivos += sorted(p for p in args.carpeta.iterdir() if es_carpeta_tablas(p))
+        base = args.carpeta
+    carpeta_salida = args.salida or base
+    carpeta_salida.mkdir(parents=True, exist_ok=True)
+
+    if not archivos:
+        print(f"⚠️ No se encontraron archivos '{args.patron}' en {args.carpeta}")
+        return 1
+
+    # Un mismo estado o clave para varios templates mezclaría el cierre de uno en la salida de otro
+    if len(archivos) > 1 and ((args.estado and not args.estado.is_dir()) or args.clave_estado):
+        print("⚠️ --estado <archivo.zip> y --clave-estado solo se aceptan con una entrada; para varias, use --estado <carpeta>.")
+        return 1
+
+    errores = 0
+    for ruta in archivos:
+        t0 = time.perf_counter()
+        try:
+            estado = buscar_estado(args.estado, ruta) if args.estado else None
+            escritos = procesar_archivo(
+                ruta, politicas, carpeta_salida,
+                procesos=args.procesos or None,
+                formato_asignacion=args.formato_asignacion,
+                formato_salida=args.formato_salida,
+                incluir_entradas=not args.sin_entradas,
+                reporte_json=args.reporte_json,
+                memoria=args.memoria,
+                almacen_delta=AlmacenDelta(args.delta, args.clave_delta or ruta.stem) if args.delta else None,
+                estado=estado,
+                mes_cierre=args.mes_cierre,
+                clave_estado=args.clave_estado,
+            )
+        except Exception as e:
+            errores += 1
+            print(f"❌ {ruta.name}: {e}")
+            continue
+        print(f"✅ {ruta.name} → {', '.join(p.name for p in escritos)} ({time.perf_counter() - t0:.1f}s)")
+
+    print(f"Procesados: {len(archivos) - errores}/{len(archivos)}")
+    return 1 if errores else 0
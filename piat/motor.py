@@ -0,0 +1,486 @@
+# =========================================================
+# PIAS — Motor de asignación (sin UI)
+# Políticas de mínimos:
+# 1) "Solo en un mes" (estricto por mes, sin arrastre, PUSH del mes)
+# 2) "Continuo" (activable desde su mes, con arrastre)
+# 3) "Óptimo" (reglas de "Continuo", resuelto por programación lineal entera por código: piat.optimo)
+#
+# - Horizonte de meses = unión (meses en Stock ∪ meses en Mínimos > 0).
+# - En "Continuo", el PUSH se registra en el/los mes(es) donde el CÓDIGO termina de asignar:
+#   * Código SIN mínimos → PUSH mensual del remanente del mes (carry -> 0).
+#   * Código CON mínimos → en su ÚLTIMO mes con mínimos y con 0 pendientes, PUSH del remanente de ese mes (carry -> 0).
+#   * Fallback de seguridad al final por si quedara carry residual.
+#
+# Modelo de datos de los motores (piat.indices): códigos y clientes como ids enteros y cuotas
+# en arrays paralelos (CuotasCompactas); las etiquetas vuelven recién al armar df_asig_idx.
+#
+# Este módulo no importa Streamlit ni librerías de gráficos: lo usan la app y el modo lote.
+# =========================================================
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .acumulador import AcumuladorSalida
+from .diagnostico import etapa
+from .entradas import Entradas, _safe_int, normalizar_entradas
+from .indices import CuotasCompactas, StockPorMes, etiquetas_codigo
+from .progreso import Progreso
+
+POLITICA_SOLO_MES = "Solo en un mes"
+POLITICA_CONTINUO = "Continuo"
+POLITICA_OPTIMO = "Óptimo"
+POLITICAS = (POLITICA_SOLO_MES, POLITICA_CONTINUO, POLITICA_OPTIMO)
+
+
+@dataclass
+class Preparacion:
+    """Estructuras comunes a los motores (sección 4)."""
+    stock_por_mes: StockPorMes
+    df_min_pos: pd.DataFrame
+    meses: list
+    mes_final: int
+    columnas_asig: list
+    etiquetas: np.ndarray      # id de código → Codigo
+    cuotas: CuotasCompactas    # estado de las cuotas (asignado, pendiente por código) que mutan los motores
+    contadores: dict = field(default_factory=dict)  # contadores de los loops del motor (diagnóstico)
+    # Horizonte móvil de "Continuo" (piat.cierre): carry al empezar y estado capturado al mes de cierre
+    carry_inicial: dict = field(default_factory=dict)  # id de código → carry abierto
+    cierre: Optional["CierreContinuo"] = None
+    progreso: Optional[Progreso] = None  # avance por mes y cancelación (piat.progreso / piat.trabajos)
+
+
+@dataclass
+class CierreContinuo:
+    """Estado de `asignar_continuo` al terminar `mes_cierre` (ids del motor; piat.cierre lo pasa a etiquetas)."""
+    mes_cierre: int
+    carry: dict            # id de código → carry, para los códigos con carry abierto
+    asignado: np.ndarray   # asignado por cuota (orden de CuotasCompactas)
+    filas_salida: int      # filas de la salida registradas hasta el cierre
+
+
+@dataclass
+class ResultadoAsignacion:
+    """
+    Salida del motor: asignación por (MES, Codigo) y métricas por fila de mínimos.
+    En "Óptimo", `optimizacion` trae una fila por código (estado, tamaño, tiempo de solver, gap).
+    En una re-ejecución delta (piat.delta), `delta` informa códigos reutilizados / recalculados.
+    """
+    modo: str
+    df_asig_idx: pd.DataFrame
+    df_min_metrics: pd.DataFrame
+    columnas_asig: list
+    optimizacion: Optional[pd.DataFrame] = None
+    contadores: dict = field(default_factory=dict)
+    delta: Optional[dict] = None
+
+
+# =========================
+# 4) Preparaciones comunes
+# =========================
+def definir_horizonte(entradas: Entradas, horizonte=None):
+    """
+    Parte global de la preparación (depende de TODOS los códigos):
+    devuelve (df_min_pos, meses, mes_final, columnas_asig).
+    Con `horizonte` = (meses, mes_final, columnas_asig) de una corrida con todos los códigos, se
+    respetan esos valores aunque `entradas` traiga solo algunos códigos (re-ejecución delta).
+    """
+    df_stock = entradas.df_stock
+    df_min = entradas.df_min
+    prioridad_series = entradas.prioridad_series
+    clientes_por_prioridad = entradas.clientes_por_prioridad
+
+    df_min_pos = df_min[df_min["Minimo"] > 0].copy()
+    df_min_pos = df_min_pos[df_min_pos.index.get_level_values(1).isin(entradas.cod_validos)]
+    if horizonte is not None:
+        return (df_min_pos, *horizonte)
+
+    # Meses a procesar = unión (stock ∪ mínimos>0)
+    meses_stock = set(df_stock["MES"].unique())
+    meses_min   = set(df_min_pos.index.get_level_values(0).unique()) if df_min_pos.shape[0] > 0 else set()
+    meses = sorted(meses_stock | meses_min)
+    mes_final = max(meses) if len(meses) else 1
+
+    # Clientes presentes en mínimos, ordenados por prioridad
+    clientes_en_min = sorted(
+        set(df_min_pos.index.get_level_values(2)),
+        key=lambda x: prioridad_series.get(x, 999)
+    )
+
+    # Columnas de salida (clientes + PUSH)
+    columnas_asig = (
+        [c for c in clientes_por_prioridad if c in clientes_en_min] +
+        [c for c in clientes_en_min if c not in clientes_por_prioridad] +
+        ["PUSH"]
+    )
+    return df_min_pos, meses, mes_final, columnas_asig
+
+
+def preparar_asignacion(entradas: Entradas, horizonte=None) -> Preparacion:
+    """Horizonte, columnas de salida e índices de stock/cuotas."""
+    df_min_pos, meses, mes_final, columnas_asig = definir_horizonte(entradas, horizonte)
+    return construir_preparacion(entradas.df_stock, df_min_pos, meses, mes_final, columnas_asig)
+
+
+def construir_preparacion(df_stock, df_min_pos, meses, mes_final, columnas_asig, etiquetas=None) -> Preparacion:
+    """
+    Índices de stock y cuotas para un conjunto de códigos, con horizonte y columnas ya fijados.
+    Se usa tanto para el total como para cada fragmento de códigos en la ejecución paralela
+    (ahí `etiquetas` son las de TODOS los códigos, para que los ids coincidan entre fragmentos).
+    """
+    if etiquetas is None:
+        etiquetas = etiquetas_codigo(df_stock)
+    return Preparacion(
+        stock_por_mes=StockPorMes.desde_df(df_stock, etiquetas),
+        df_min_pos=df_min_pos,
+        meses=meses,
+        mes_final=mes_final,
+        columnas_asig=columnas_asig,
+        etiquetas=etiquetas,
+        cuotas=CuotasCompactas.desde_df(df_min_pos, etiquetas, columnas_asig[:-1]),
+    )
+
+
+# =========================
+# 5) Motores de asignación
+# =========================
+def asignar_solo_en_su_mes(prep: Preparacion) -> AcumuladorSalida:
+    """Mínimos exigibles solo en su MES exacto. Stock no se arrastra. Sobrantes -> PUSH del mes."""
+    stock_por_mes = prep.stock_por_mes
+    cuotas = prep.cuotas
+    # memoryview: acceso por índice a los arrays de cuotas sin crear escalares de numpy
+    mes_q, minimo, asignado = memoryview(cuotas.mes), memoryview(cuotas.minimo), memoryview(cuotas.asignado)
+    grupo_inicio, grupo_cliente = memoryview(cuotas.grupo_inicio), memoryview(cuotas.grupo_cliente)
+    codigo_grupos, pendiente_codigo = memoryview(cuotas.codigo_grupos), memoryview(cuotas.pendiente)
+    salida = AcumuladorSalida(prep.columnas_asig, prep.etiquetas)
+    filas_stock = cuotas_visitadas = asignaciones = 0  # contadores locales (diagnóstico)
+    progreso = prep.progreso
+    if progreso is not None:
+        progreso.iniciar(f"5) Motor ({POLITICA_SOLO_MES})", meses=len(prep.meses))
+
+    for mes in prep.meses:
+        filas_antes = filas_stock
+        for codigo, stock_disp in stock_por_mes.del_mes(mes):
+            filas_stock += 1
+            stock_disp = _safe_int(stock_disp)
+            if stock_disp <= 0:
+                salida.agregar_fila(mes, codigo)
+                continue
+            asign_fila = []  # (j_cliente, cantidad)
+            # grupos (código, cliente) del código, por prioridad; cuotas de cada grupo por MES
+            for g in range(codigo_grupos[codigo], codigo_grupos[codigo + 1]):
+                a, b = grupo_inicio[g], grupo_inicio[g + 1]
+                cuotas_visitadas += b - a
+                for q in range(a, b):
+                    if mes_q[q] != mes:
+                        continue
+                    pendiente = minimo[q] - asignado[q]
+                    if pendiente <= 0:
+                        continue
+                    asign = min(pendiente, stock_disp)
+                    asignado[q] += asign
+                    pendiente_codigo[codigo] -= asign
+                    stock_disp -= asign
+                    asign_fila.append((grupo_cliente[g], asign))
+                    if stock_disp <= 0:
+                        break
+                if stock_disp <= 0:
+                    break
+            asignaciones += len(asign_fila)
+            push = float(stock_disp) if stock_disp > 0 else 0.0
+            salida.agregar_fila(mes, codigo, asign_fila, push)
+        if progreso is not None:
+            progreso.avanzar(meses=1, codigos=filas_stock - filas_antes)
+    prep.contadores.update(
+        filas_stock=filas_stock, cuotas_visitadas=cuotas_visitadas, asignaciones=asignaciones, filas_salida=len(salida)
+    )
+    return salida
+
+
+def asignar_continuo(prep: Preparacion, mes_cierre=None) -> AcumuladorSalida:
+    """
+    Mínimos activables desde su MES y consumibles hacia adelante. Stock se arrastra (carry).
+    El PUSH se registra en el mes donde el CÓDIGO termina de asignar:
+      - Código SIN mínimos → PUSH mensual (todo lo disponible del mes + carry).
+      - Código CON mínimos → en su último mes y con 0 pendientes, remanente a PUSH del mes.
+    Con mes_cierre, deja en prep.cierre el estado al terminar ese mes (antes del fallback final);
+    prep.carry_inicial retoma el carry de un cierre anterior.
+    """
+    stock_por_mes = prep.stock_por_mes
+    cuotas = prep.cuotas
+    mes_q, minimo, asignado = memoryview(cuotas.mes), memoryview(cuotas.minimo), memoryview(cuotas.asignado)
+    grupo_inicio, grupo_cliente = memoryview(cuotas.grupo_inicio), memoryview(cuotas.grupo_cliente)
+    codigo_grupos = memoryview(cuotas.codigo_grupos)
+    # pendiente total por código: se descuenta junto con `asignado` (consulta O(1))
+    pendiente_codigo, ultimo_mes = memoryview(cuotas.pendiente), memoryview(cuotas.ultimo_mes)
+    sin_minimos = CuotasCompactas.SIN_MINIMOS
+    salida = AcumuladorSalida(prep.columnas_asig, prep.etiquetas)
+
+    # contadores locales (diagnóstico)
+    codigos_mes = cuotas_visitadas = asignaciones = consultas_pendientes = push_registrados = 0
+
+    carry_stock = [0] * len(prep.etiquetas)  # stock arrastrable por id de código
+    con_carry = set()  # códigos con carry abierto (llegó stock y aún no se limpió)
+    for codigo, carry in prep.carry_inicial.items():
+        carry_stock[codigo] = carry
+        con_carry.add(codigo)
+
+    def cerrar():
+        prep.cierre = CierreContinuo(
+            mes_cierre, {c: carry_stock[c] for c in sorted(con_carry)}, cuotas.asignado.copy(), len(salida)
+        )
+
+    progreso = prep.progreso
+    if progreso is not None:
+        progreso.iniciar(f"5) Motor ({POLITICA_CONTINUO})", meses=len(prep.meses))
+
+    for mes in prep.meses:
+        if mes_cierre is not None and prep.cierre is None and mes > mes_cierre:
+            cerrar()
+        llegadas_mes = dict(stock_por_mes.del_mes(mes))
+        # acumular llegadas
+        for codigo, inc in llegadas_mes.items():
+            carry_stock[codigo] += _safe_int(inc)
+        # procesar códigos con carry o llegadas (UNIÓN)
+        con_carry.update(llegadas_mes)
+
+        codigos_del_mes = sorted(con_carry)
+        for codigo in codigos_del_mes:
+            codigos_mes += 1
+            asign_fila = []  # (j_cliente, cantidad)
+            push = 0.0
+            carry = carry_stock[codigo]
+
+            # repartir a cuotas activas (MES_obj <= mes): grupos (código, cliente) por prioridad
+            if carry > 0:
+                for g in range(codigo_grupos[codigo], codigo_grupos[codigo + 1]):
+                    for q in range(grupo_inicio[g], grupo_inicio[g + 1]):
+                        cuotas_visitadas += 1
+                        if mes_q[q] > mes:
+                            break  # aún no activada
+                        pendiente = minimo[q] - asignado[q]
+                        if pendiente <= 0:
+                            continue
+                        asign = min(pendiente, carry)
+                        asignado[q] += asign
+                        pendiente_codigo[codigo] -= asign
+                        carry -= asign
+                        asign_fila.append((grupo_cliente[g], asign))
+                        if carry <= 0:
+                            break
+                    if carry <= 0:
+                        break
+
+            # --- DECISIÓN DE PUSH DEL MES ---
+            last_mes = ultimo_mes[codigo]
+            if last_mes == sin_minimos:
+                # sin mínimos → PUSH mensual
+                if carry > 0:
+                    push = float(carry)
+                    carry = 0
+            elif mes >= last_mes and carry > 0:
+                # con mínimos → último mes y 0 pendientes
+                consultas_pendientes += 1
+                if pendiente_codigo[codigo] == 0:
+                    push = float(carry)
+                    carry = 0
+            carry_stock[codigo] = carry
+
+            # registrar fila si hubo asignación o recepción de stock
+            if asign_fila or push > 0 or (codigo in llegadas_mes):
+                asignaciones += len(asign_fila)
+                push_registrados += push > 0
+                salida.agregar_fila(mes, codigo, asign_fila, push)
+
+        # limpieza opcional de carry
+        for codigo in [c for c in con_carry if carry_stock[c] <= 0 and c not in llegadas_mes]:
+            con_carry.discard(codigo)
+            carry_stock[codigo] = 0
+        if progreso is not None:
+            progreso.avanzar(meses=1, codigos=len(codigos_del_mes))
+
+    if mes_cierre is not None and prep.cierre is None:
+        cerrar()
+
+    # Fallback de seguridad
+    push_fallback = 0
+    for codigo in sorted(con_carry):
+        rem = carry_stock[codigo]
+        if rem > 0:
+            push_fallback += 1
+            salida.agregar_fila(prep.mes_final, codigo, push=float(rem))
+    prep.contadores.update(
+        codigos_mes=codigos_mes,
+        cuotas_visitadas=cuotas_visitadas,
+        asignaciones=asignaciones,
+        consultas_pendientes=consultas_pendientes,
+        push_registrados=push_registrados,
+        push_fallback=push_fallback,
+        filas_salida=len(salida),
+    )
+    return salida
+
+
+def asignar_solo_en_su_mes_vectorizado(prep: Preparacion):
+    """
+    Misma política que `asignar_solo_en_su_mes`, con operaciones de arrays sobre todos los
+    (MES, Codigo) a la vez. Sin arrastre, cada (MES, Codigo) es un llenado greedy independiente:
+    cuotas del mes ordenadas por prioridad de cliente → suma acumulada → recorte al stock.
+    Devuelve (df_asig_idx, asignado) con `asignado` alineado a las filas de df_min_pos
+    (también queda en prep.cuotas.asignado).
+    """
+    spm = prep.stock_por_mes
+    cuotas = prep.cuotas
+    columnas_asig = prep.columnas_asig
+    n_filas = len(spm.codigos)
+    if prep.progreso is not None:
+        prep.progreso.iniciar(f"5) Motor ({POLITICA_SOLO_MES}, vectorizado)", meses=len(prep.meses))
+    if n_filas == 0:
+        prep.contadores.update(filas_stock=0, cuotas_activas=0, asignaciones=0, filas_salida=0)
+        return AcumuladorSalida(columnas_asig).a_dataframe(), cuotas.asignado_por_fila()
+
+    # Stock por fila (MES, Codigo): entero como en el motor de loops
+    n_cod = len(prep.etiquetas)
+    i_mes_fila = np.repeat(np.arange(len(spm.meses)), np.diff(spm.inicio))
+    clave_fila = i_mes_fila * n_cod + spm.codigos  # creciente: filas ordenadas por (MES, id)
+    stock = np.trunc(spm.cantidades.astype(np.float64)).astype(np.int64)
+
+    # Cada cuota → fila de stock de su MES exacto (-1 si ese mes no trae stock del código)
+    mes_q = cuotas.mes
+    cod_q = cuotas.codigo_por_cuota()
+    rank_q = cuotas.cliente
+    qty_q = cuotas.minimo
+    i_mes_q = np.minimum(np.searchsorted(spm.meses, mes_q), len(spm.meses) - 1)
+    clave_q = i_mes_q * n_cod + cod_q
+    fila_q = np.minimum(np.searchsorted(clave_fila, clave_q), n_filas - 1)
+    fila_q = np.where((spm.meses[i_mes_q] == mes_q) & (clave_fila[fila_q] == clave_q), fila_q, -1)
+
+    # Orden de llenado: fila de stock, luego prioridad del cliente (orden de columnas_asig)
+    activas = np.flatnonzero(fila_q >= 0)
+    orden = activas[np.lexsort((rank_q[activas], fila_q[activas]))]
+    fila_o = fila_q[orden]
+    qty_o = qty_q[orden]
+    acum = np.cumsum(qty_o)
+    inicio_grupo = np.r_[True, fila_o[1:] != fila_o[:-1]]
+    base = np.maximum.accumulate(np.where(inicio_grupo, acum - qty_o, 0))
+    antes = acum - qty_o - base  # demanda de clientes previos en el mismo (MES, Codigo)
+    asign_o = np.clip(stock[fila_o] - antes, 0, qty_o)
+
+    cuotas.asignado[orden] = asign_o
+    prep.contadores.update(
+        filas_stock=n_filas, cuotas_activas=len(activas), asignaciones=int(np.count_nonzero(asign_o)), filas_salida=n_filas
+    )
+
+    # Matriz de salida (filas de stock × clientes) + PUSH con el remanente del mes
+    matriz = np.zeros((n_filas, len(columnas_asig) - 1), dtype=np.int64)
+    matriz[fila_o, rank_q[orden]] = asign_o
+    push = np.where(stock > 0, stock - matriz.sum(axis=1), 0).astype(np.float64)
+
+    idx_stock = pd.MultiIndex.from_arrays(
+        [np.repeat(spm.meses, np.diff(spm.inicio)), prep.etiquetas[spm.codigos]], names=["MES", "Codigo"]
+    )
+    df_asig_idx = pd.DataFrame(matriz, index=idx_stock, columns=columnas_asig[:-1])
+    df_asig_idx["PUSH"] = push
+    if prep.progreso is not None:
+        prep.progreso.avanzar(meses=len(prep.meses), codigos=n_filas)
+    return df_asig_idx, cuotas.asignado_por_fila()
+
+
+MOTORES = {
+    POLITICA_SOLO_MES: asignar_solo_en_su_mes,
+    POLITICA_CONTINUO: asignar_continuo,
+}
+
+
+# =========================
+# 6) Métricas (el DataFrame de salida lo arma AcumuladorSalida)
+# =========================
+def metricas_minimos(df_min_pos: pd.DataFrame, asignado) -> pd.DataFrame:
+    """Métricas por fila del template: asignado, cumplimiento y pendiente final."""
+    df_min_metrics = df_min_pos.copy()
+    df_min_metrics["Asignado"] = asignado
+    df_min_metrics["Cumple"] = df_min_metrics["Asignado"] >= df_min_metrics["Minimo"]
+    df_min_metrics["Pendiente Final"] = (df_min_metrics["Minimo"] - df_min_metrics["Asignado"]).clip(lower=0)
+    return df_min_metrics
+
+
+# =========================
+# API
+# =========================
+def ejecutar_asignacion(
+    entradas: Entradas,
+    modo: str = POLITICA_CONTINUO,
+    vectorizado: bool = True,
+    procesos: int = 1,
+    diagnostico=None,
+    horizonte=None,
+    progreso: Optional[Progreso] = None,
+) -> ResultadoAsignacion:
+    """
+    Corre la política `modo` sobre entradas ya normalizadas.
+    vectorizado=False fuerza el motor de loops en "Solo en un mes" (referencia).
+    procesos != 1 reparte "Continuo" y "Óptimo" por códigos en un pool de procesos (None = todos los núcleos).
+    diagnostico (piat.diagnostico.Diagnostico) registra las etapas 4-6 y los contadores del motor.
+    horizonte fija (meses, mes_final, columnas_asig) al correr un subconjunto de códigos (ver definir_horizonte).
+    progreso (piat.progreso.Progreso) recibe el avance por mes / código; si se cancela, lanza CorridaCancelada.
+    """
+    if modo not in POLITICAS:
+        raise ValueError(f"Política desconocida: {modo!r}. Opciones: {', '.join(POLITICAS)}")
+    if progreso is not None:
+        progreso.iniciar("4) Preparación")
+    optimizacion = None
+    salida = None
+    if modo == POLITICA_OPTIMO or (modo == POLITICA_CONTINUO and procesos != 1):
+        # Preparación y motor corren juntos dentro de cada fragmento de códigos
+        with etapa(diagnostico, f"4-5) Preparación + motor ({modo})", procesos=procesos) as registro:
+            if modo == POLITICA_OPTIMO:
+                from .optimo import asignar_optimo  # import diferido: optimo depende de este módulo (y de SciPy)
+                df_min_pos, columnas_asig, salida, asignado, optimizacion, contadores = asignar_optimo(
+                    entradas, procesos, horizonte=horizonte, progreso=progreso
+                )
+            else:
+                from .paralelo import asignar_continuo_paralelo  # import diferido: paralelo depende de este módulo
+                df_min_pos, columnas_asig, salida, asignado, contadores = asignar_continuo_paralelo(
+                    entradas, procesos, horizonte=horizonte, progreso=progreso
+                )
+            registro["filas"] = len(salida)
+    else:
+        with etapa(diagnostico, "4) Preparación") as registro:
+            prep = preparar_asignacion(entradas, horizonte)
+            prep.progreso = progreso
+            df_min_pos, columnas_asig = prep.df_min_pos, prep.columnas_asig
+            registro["filas"] = len(df_min_pos)
+        with etapa(diagnostico, f"5) Motor ({modo})") as registro:
+            if modo == POLITICA_SOLO_MES and vectorizado:
+                df_asig_idx, asignado = asignar_solo_en_su_mes_vectorizado(prep)
+            else:
+                salida = MOTORES[modo](prep)
+                asignado = None  # se lee de prep.cuotas en la etapa 6
+            contadores = prep.contadores
+            registro["filas"] = contadores.get("filas_salida", 0)
+
+    if progreso is not None:
+        progreso.iniciar("6) Ensamblado y métricas")
+    with etapa(diagnostico, "6) Ensamblado y métricas") as registro:
+        if salida is not None:
+            df_asig_idx = salida.a_dataframe()
+        if asignado is None:
+            asignado = prep.cuotas.asignado_por_fila()
+        resultado = ResultadoAsignacion(
+            modo=modo,
+            df_asig_idx=df_asig_idx,
+            df_min_metrics=metricas_minimos(df_min_pos, asignado),
+            columnas_asig=columnas_asig,
+            optimizacion=optimizacion,
+            contadores=dict(contadores),
+        )
+        registro["filas"] = len(df_asig_idx)
+    if diagnostico is not None:
+        diagnostico.sumar_contadores(resultado.contadores)
+    return resultado
+
+
+def asignar(df_stock, df_prior, df_min, modo: str = POLITICA_CONTINUO, **opciones) -> ResultadoAsignacion:
+    """Normaliza tablas crudas (como vienen del Excel) y ejecuta la política elegida."""
+    return ejecutar_asignacion(normalizar_entradas(df_stock, df_prior, df_min), modo, **opciones)
@@ -0,0 +1,323 @@
+# =========================================================
+# PIAS — Política "Óptimo": asignación por programación lineal entera (SciPy / HiGHS)
+# Mismo horizonte, columnas y reglas de activación que "Continuo" (el mínimo se activa en su
+# MES y puede cumplirse después; el stock se arrastra), pero en lugar del llenado greedy mes a
+# mes se resuelve, POR CÓDIGO, el problema:
+#
+#   max  Σ (1 + peso_cliente) · x[k, t]  −  PENALIZACION_ATRASO · (t − mes_k) · x[k, t]
+#   s.a. Σ_k x[k, t] + inv[t] − inv[t−1] = stock[t]      (balance de stock con arrastre)
+#        Σ_t x[k, t] ≤ minimo_k                            (cada cuota, como máximo su mínimo)
+#        x[k, t] ≥ 0 solo para t ≥ mes de activación de k,  inv[t] ≥ 0
+#
+# peso_cliente ∈ (0, 1] según el orden de prioridad (columnas_asig). El "1 +" hace que una
+# unidad entregada siempre valga más que cualquier diferencia de prioridad.
+# - Los códigos no comparten stock, así que cada código es un subproblema chico e independiente
+#   (se reparten en un pool de procesos igual que "Continuo" en paralelo).
+# - Si el stock acumulado cubre la demanda acumulada en cada mes, la solución óptima es directa
+#   (todo en su mes de activación) y no se llama al solver.
+# - El subproblema tiene solo las cuotas del código. La matriz de restricciones y el objetivo
+#   dependen de su patrón (meses y cuotas como (mes de activación, cliente)); se reutilizan entre
+#   códigos con el mismo patrón (solo cambian stock y mínimos). Con datos variados el patrón casi
+#   no se repite: el caché no agranda el problema para forzar aciertos.
+# - El PUSH sigue la regla de "Continuo": remanente en el mes en que el código termina.
+# =========================================================
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import csr_matrix
+
+from .acumulador import AcumuladorSalida
+from .entradas import Entradas
+from .motor import POLITICA_OPTIMO, definir_horizonte
+from .progreso import mapear
+
+PENALIZACION_ATRASO = 1e-3  # por mes de atraso; debe ser chica frente al peso de una unidad
+TIEMPO_LIMITE_SEG = 10.0    # por código
+GAP_RELATIVO = 1e-4
+
+COLUMNAS_RESUMEN = ["Codigo", "Estado", "Variables", "Restricciones", "Tiempo (s)", "Gap", "Objetivo"]
+
+
+# =========================
+# Subproblema por código
+# =========================
+def _estructura(meses_t, ia, rank, n_cli, mes_act):
+    """
+    Matriz de restricciones, costos y mapeo de variables para una estructura de código.
+    Variables: x[k, t] para t ≥ ia[k] (índices en meses_t) y luego inv[t].
+    Filas: balance de stock por t, luego cota por cuota k.
+    """
+    n_t, n_k = len(meses_t), len(ia)
+    largo = n_t - ia
+    var_k = np.repeat(np.arange(n_k), largo)
+    var_t = np.arange(len(var_k)) - np.repeat(np.cumsum(largo) - largo, largo) + ia[var_k]
+    n_x = len(var_k)
+
+    # Balance: x[k, t] en fila t; inv[t] con +1 en t y −1 en t+1
+    filas = np.concatenate([var_t, np.arange(n_t), np.arange(1, n_t), n_t + var_k])
+    cols = np.concatenate([np.arange(n_x), n_x + np.arange(n_t), n_x + np.arange(n_t - 1), np.arange(n_x)])
+    vals = np.concatenate([np.ones(n_x), np.ones(n_t), -np.ones(n_t - 1), np.ones(n_x)])
+    A = csr_matrix((vals, (filas, cols)), shape=(n_t + n_k, n_x + n_t))
+
+    peso = 1.0 + (n_cli - rank[var_k]) / n_cli
+    atraso = meses_t[var_t] - mes_act[var_k]
+    c = np.concatenate([-(peso - PENALIZACION_ATRASO * atraso), np.zeros(n_t)])
+    return A, c, var_k, var_t
+
+
+def _greedy(stock_t, ia, rank, mes_q, minimo):
+    """Llenado de "Continuo" sobre un código (respaldo si el solver no devuelve solución)."""
+    x = np.zeros((len(ia), len(stock_t)), dtype=np.int64)
+    pendiente = minimo.copy()
+    orden = np.lexsort((mes_q, rank))
+    carry = 0
+    for t, llegada in enumerate(stock_t):
+        carry += llegada
+        for k in orden:
+            if carry <= 0:
+                break
+            if ia[k] <= t and pendiente[k] > 0:
+                asign = min(pendiente[k], carry)
+                x[k, t] = asign
+                pendiente[k] -= asign
+                carry -= asign
+    return x
+
+
+def resolver_codigo(meses_t, stock_t, mes_q, rank, minimo, n_cli, entero=True, tiempo_limite=TIEMPO_LIMITE_SEG, cache=None):
+    """
+    Asignación óptima de un código. meses_t: meses con llegada o activación (ordenados);
+    stock_t: llegadas en esos meses; mes_q/rank/minimo: una entrada por cuota.
+    Devuelve (x, info) con x[k, t] entero y info = (estado, variables, restricciones, tiempo, gap, objetivo).
+    """
+    mes_act = np.maximum(mes_q, meses_t[0])
+    ia = np.searchsorted(meses_t, mes_act)
+
+    # Caso directo: la demanda acumulada nunca supera el stock acumulado
+    demanda_t = np.bincount(ia, weights=minimo, minlength=len(meses_t))
+    if np.all(np.cumsum(demanda_t) <= np.cumsum(stock_t)):
+        x = np.zeros((len(minimo), len(meses_t)), dtype=np.int64)
+        x[np.arange(len(minimo)), ia] = minimo
+        return x, ("directo", 0, 0, 0.0, 0.0, np.nan)
+
+    # Patrón del código: cuotas ordenadas por (mes de activación, cliente)
+    orden = np.lexsort((rank, ia))
+    clave = (meses_t.tobytes(), ia[orden].tobytes(), rank[orden].tobytes())
+    if cache is not None and clave in cache:
+        A, c, var_k, var_t = cache[clave]
+    else:
+        A, c, var_k, var_t = _estructura(meses_t, ia[orden], rank[orden], n_cli, mes_act[orden])
+        if cache is not None:
+            cache[clave] = (A, c, var_k, var_t)
+
+    n_t, n_x = len(meses_t), len(var_k)
+    minimo_o = minimo[orden]
+    lb = np.concatenate([stock_t, np.full(len(minimo), -np.inf)])
+    ub = np.concatenate([stock_t, minimo_o]).astype(np.float64)
+    cotas = Bounds(0, np.concatenate([minimo_o[var_k], np.full(n_t, np.inf)]))
+    t0 = time.perf_counter()
+    res = milp(
+        c,
+        constraints=LinearConstraint(A, lb, ub),
+        integrality=np.ones(len(c)) if entero else None,
+        bounds=cotas,
+        options={"time_limit": tiempo_limite, "mip_rel_gap": GAP_RELATIVO},
+    )
+    segundos = time.perf_counter() - t0
+    if res.x is None:
+        return _greedy(stock_t, ia, rank, mes_q, minimo), ("greedy", n_x + n_t, A.shape[0], segundos, np.nan, np.nan)
+
+    x = np.zeros((len(minimo), n_t), dtype=np.int64)
+    x[orden[var_k], var_t] = np.floor(res.x[:n_x] + 1e-6).astype(np.int64)  # floor: nunca excede stock
+    estado = "óptimo" if res.status == 0 else "límite"
+    gap = float(getattr(res, "mip_gap", 0.0) or 0.0) if entero else 0.0
+    return x, (estado, n_x + n_t, A.shape[0], segundos, gap, -float(res.fun))
+
+
+# =========================
+# Fragmento de códigos (un proceso)
+# =========================
+def _registrar_codigo(salida, codigo, meses_t, stock_t, x, rank_q, mes_q, minimo, mes_final):
+    """Filas de salida de un código con la regla de PUSH de "Continuo"."""
+    servido_t = x.sum(axis=0)
+    pendiente = int(minimo.sum())
+    last_mes = int(mes_q.max()) if len(mes_q) else None
+    carry = 0
+    for t, mes in enumerate(meses_t):
+        carry += int(stock_t[t]) - int(servido_t[t])
+        pendiente -= int(servido_t[t])
+        push = 0.0
+        if carry > 0 and (last_mes is None or (mes >= last_mes and pendiente == 0)):
+            push = float(carry)
+            carry = 0
+        nz = np.flatnonzero(x[:, t])
+        if len(nz) or push > 0 or stock_t[t] > 0:
+            salida.agregar_fila(int(mes), codigo, zip(rank_q[nz].tolist(), x[nz, t].tolist()), push)
+    if carry > 0:
+        salida.agregar_fila(mes_final, codigo, push=float(carry))
+
+
+def _resolver_fragmento(args, progreso=None):
+    """
+    Proceso hijo: resuelve los códigos del fragmento.
+    Devuelve (salida, asignado, resumen, contadores) con `asignado` alineado a las cuotas recibidas.
+    En serie, `progreso` recibe un avance por código (y corta si se canceló).
+    """
+    stock, cuotas, mes_final, columnas_asig, entero, tiempo_limite = args
+    cod_s, mes_s, qty_s = stock
+    cod_q, mes_q, rank_q, min_q = cuotas
+    n_cli = len(columnas_asig) - 1
+    salida = AcumuladorSalida(columnas_asig)
+    asignado = np.zeros(len(cod_q), dtype=np.int64)
+    resumen = []
+    cache = {}
+
+    # Ambos arreglos vienen ordenados por código → cortes contiguos
+    codigos, ini_s = np.unique(cod_s, return_index=True)
+    fin_s = np.append(ini_s[1:], len(cod_s))
+    ini_q = np.searchsorted(cod_q, codigos, side="left")
+    fin_q = np.searchsorted(cod_q, codigos, side="right")
+
+    for codigo, a, b, p, q in zip(codigos, ini_s, fin_s, ini_q, fin_q):
+        meses_s, stock_s = mes_s[a:b], qty_s[a:b]
+        mes_k, rank_k, min_k = mes_q[p:q], rank_q[p:q], min_q[p:q]
+        meses_t = np.union1d(meses_s, np.maximum(mes_k, meses_s[0]))
+        stock_t = np.zeros(len(meses_t), dtype=np.int64)
+        stock_t[np.searchsorted(meses_t, meses_s)] = stock_s
+        if q > p:
+            x, info = resolver_codigo(meses_t, stock_t, mes_k, rank_k, min_k, n_cli, entero, tiempo_limite, cache)
+            asignado[p:q] = x.sum(axis=1)
+            resumen.append((codigo, *info))
+        else:
+            x = np.zeros((0, len(meses_t)), dtype=np.int64)
+        _registrar_codigo(salida, codigo, meses_t, stock_t, x, rank_k, mes_k, min_k, mes_final)
+        if progreso is not None:
+            progreso.avanzar(codigos=1)
+
+    estados = [fila[1] for fila in resumen]
+    llamadas_solver = len(estados) - estados.count("directo")
+    contadores = {
+        "codigos": len(codigos),
+        "cuotas": len(cod_q),
+        "codigos_directos": estados.count("directo"),
+        "llamadas_solver": llamadas_solver,
+        "estructuras_reutilizadas": llamadas_solver - len(cache),
+        "respaldo_greedy": estados.count("greedy"),
+        "filas_salida": len(salida),
+    }
+    return salida, asignado, resumen, contadores
+
+
+# =========================
+# API
+# =========================
+def asignar_optimo(
+    entradas: Entradas,
+    procesos: int = 1,
+    entero: bool = True,
+    tiempo_limite: float = TIEMPO_LIMITE_SEG,
+    fragmentos_por_proceso: int = 4,
+    horizonte=None,
+    progreso=None,
+):
+    """
+    Política "Óptimo" sobre entradas normalizadas. procesos=None usa todos los núcleos.
+    Devuelve (df_min_pos, columnas_asig, salida, asignado, resumen, contadores) con `asignado`
+    alineado a df_min_pos, `resumen` = una fila por código con mínimos (estado, tamaño, tiempo, gap,
+    objetivo) y los contadores sumados de los fragmentos. `horizonte`: ver motor.definir_horizonte.
+    `progreso` (piat.progreso) avanza por código en serie y por fragmento en paralelo.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    df_min_pos, meses, mes_final, columnas_asig = definir_horizonte(entradas, horizonte)
+
+    # Stock entero por (Codigo, MES) y cuotas, ambos ordenados por código
+    stock = (
+        entradas.df_stock.groupby(["Codigo", "MES"], sort=True)["Stock Disponible"].sum()
+    )
+    cod_s = stock.index.get_level_values(0).to_numpy(dtype=object)
+    mes_s = stock.index.get_level_values(1).to_numpy(dtype=np.int64)
+    qty_s = np.trunc(stock.to_numpy(dtype=np.float64)).astype(np.int64)
+
+    cod_m = df_min_pos.index.get_level_values(1).to_numpy(dtype=object)
+    orden_q = np.lexsort((df_min_pos.index.get_level_values(0).to_numpy(), cod_m)) if len(cod_m) else np.zeros(0, dtype=np.int64)
+    cod_q = cod_m[orden_q]
+    mes_q = df_min_pos.index.get_level_values(0).to_numpy(dtype=np.int64)[orden_q]
+    rank_q = pd.Index(columnas_asig).get_indexer(df_min_pos.index.get_level_values(2))[orden_q]
+    min_q = df_min_pos["Minimo"].to_numpy(dtype=np.int64)[orden_q]
+
+    # Fragmentos contiguos de códigos (los arreglos ya están ordenados por código)
+    codigos = np.unique(cod_s)
+    n_fragmentos = max(1, min(len(codigos), procesos * fragmentos_por_proceso)) if procesos > 1 else 1
+    bordes = np.linspace(0, len(codigos), n_fragmentos + 1, dtype=np.int64)
+    cortes = codigos[bordes[1:-1]]
+    lim_s = np.r_[0, np.searchsorted(cod_s, cortes), len(cod_s)]
+    lim_q = np.r_[0, np.searchsorted(cod_q, cortes), len(cod_q)]
+    tareas = [
+        (
+            (cod_s[lim_s[i]:lim_s[i + 1]], mes_s[lim_s[i]:lim_s[i + 1]], qty_s[lim_s[i]:lim_s[i + 1]]),
+            (cod_q[lim_q[i]:lim_q[i + 1]], mes_q[lim_q[i]:lim_q[i + 1]], rank_q[lim_q[i]:lim_q[i + 1]], min_q[lim_q[i]:lim_q[i + 1]]),
+            mes_final, columnas_asig, entero, tiempo_limite,
+        )
+        for i in range(n_fragmentos)
+    ]
+
+    if progreso is not None:
+        progreso.iniciar(f"4-5) Motor ({POLITICA_OPTIMO})", codigos=len(codigos))
+    if procesos > 1 and n_fragmentos > 1:
+        with ProcessPoolExecutor(max_workers=min(procesos, n_fragmentos)) as pool:
+            partes = mapear(pool, _resolver_fragmento, tareas, progreso, np.diff(bordes))
+    else:
+        partes = [_resolver_fragmento(t, progreso) for t in tareas]
+
+    salida = AcumuladorSalida(columnas_asig)
+    asignado_q = np.zeros(len(cod_q), dtype=np.int64)
+    filas_resumen = []
+    contadores = {"fragmentos": n_fragmentos}
+    for i, (salida_frag, asignado_frag, resumen_frag, contadores_frag) in enumerate(partes):
+        salida.extender(salida_frag)
+        asignado_q[lim_q[i]:lim_q[i + 1]] = asignado_frag
+        filas_resumen.extend(resumen_frag)
+        for clave, valor in contadores_frag.items():
+            contadores[clave] = contadores.get(clave, 0) + valor
+
+    asignado = np.zeros(len(df_min_pos), dtype=np.int64)
+    asignado[orden_q] = asignado_q
+    resumen = pd.DataFrame(filas_resumen, columns=COLUMNAS_RESUMEN)
+    return df_min_pos, columnas_asig, salida, asignado, resumen, contadores
+
+
+# =========================
+# Comparación entre políticas
+# =========================
+def resumen_optimizacion(resumen: pd.DataFrame) -> dict:
+    """Totales del resumen por código: códigos por estado, tiempo de solver y gap máximo."""
+    return {
+        "codigos": int(len(resumen)),
+        "por_estado": resumen["Estado"].value_counts().to_dict(),
+        "tiempo_solver_s": float(resumen["Tiempo (s)"].sum()),
+        "gap_max": float(resumen["Gap"].max()) if resumen["Gap"].notna().any() else 0.0,
+    }
+
+
+def comparar_cumplimiento(resultados: dict) -> pd.DataFrame:
+    """
+    Cumplimiento por cliente de varias corridas ({nombre: ResultadoAsignacion}) sobre las mismas entradas:
+    Minimo y, por política, Asignado (acotado al mínimo de cada fila) y % de cumplimiento. Fila final TOTAL.
+    """
+    tabla = None
+    for nombre, resultado in resultados.items():
+        m = resultado.df_min_metrics
+        por_cliente = pd.DataFrame({
+            "Minimo": m["Minimo"],
+            nombre: np.minimum(m["Asignado"], m["Minimo"]),
+        }).groupby(level=2).sum()
+        tabla = por_cliente if tabla is None else tabla.join(por_cliente[[nombre]], how="outer")
+    tabla.loc["TOTAL"] = tabla.sum()
+    for nombre in resultados:
+        tabla[f"% {nombre}"] = (100 * tabla[nombre] / tabla["Minimo"].where(tabla["Minimo"] > 0)).round(1)
+    tabla.index.name = "Cliente"
+    return tabla
@@ -0,0 +1,83 @@
+# =========================================================
+# PIAS — Ejecución paralela del motor "Continuo" por fragmentos de códigos
+# En asignar_continuo todo el estado que cruza meses (carry_stock, asignado de las cuotas,
+# decisión de PUSH) está indexado por Codigo. Cada fragmento de códigos corre el
+# horizonte COMPLETO en un proceso aparte; el horizonte (meses, mes_final) y las
+# columnas de clientes se fijan antes con TODOS los códigos, así que el resultado
+# unido es idéntico al del motor serial. Los ids de código (piat.indices) también se fijan
+# con todos los códigos: las filas de los fragmentos se unen sin remapear.
+# =========================================================
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .acumulador import AcumuladorSalida
+from .entradas import Entradas
+from .indices import etiquetas_codigo
+from .motor import POLITICA_CONTINUO, asignar_continuo, construir_preparacion, definir_horizonte
+from .progreso import mapear
+
+
+def fragmentar_codigos(codigos: np.ndarray, valores, n_fragmentos: int) -> np.ndarray:
+    """
+    Fragmento de cada valor de `valores`: reparto round-robin sobre `codigos` (únicos, ordenados).
+    Determinístico: no depende de hashes ni del orden de las filas.
+    """
+    return np.searchsorted(codigos, np.asarray(valores, dtype=object)) % n_fragmentos
+
+
+def _correr_fragmento(args):
+    """Proceso hijo: arma la preparación del fragmento y corre el horizonte completo."""
+    df_stock, df_min_pos, meses, mes_final, columnas_asig, etiquetas = args
+    prep = construir_preparacion(df_stock, df_min_pos, meses, mes_final, columnas_asig, etiquetas)
+    salida = asignar_continuo(prep)
+    return salida, prep.cuotas.asignado_por_fila(), prep.contadores
+
+
+def asignar_continuo_paralelo(
+    entradas: Entradas, procesos=None, fragmentos_por_proceso: int = 4, horizonte=None, progreso=None
+):
+    """
+    Corre "Continuo" repartiendo los códigos en un pool de procesos.
+    Devuelve (df_min_pos, columnas_asig, salida, asignado, contadores) con `asignado`
+    alineado a df_min_pos, igual que el motor serial, y los contadores sumados de los fragmentos.
+    `horizonte`: ver motor.definir_horizonte. `progreso` (piat.progreso) avanza por fragmento terminado.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    df_stock = entradas.df_stock
+    df_min_pos, meses, mes_final, columnas_asig = definir_horizonte(entradas, horizonte)
+
+    codigos = etiquetas_codigo(df_stock)
+    n_fragmentos = max(1, min(len(codigos), procesos * fragmentos_por_proceso))
+    frag_stock = fragmentar_codigos(codigos, df_stock["Codigo"], n_fragmentos)
+    frag_min = fragmentar_codigos(codigos, df_min_pos.index.get_level_values(1), n_fragmentos)
+
+    tareas, posiciones = [], []
+    for i in range(n_fragmentos):
+        pos_min = np.flatnonzero(frag_min == i)
+        tareas.append((
+            df_stock[frag_stock == i],
+            df_min_pos.iloc[pos_min],
+            meses,
+            mes_final,
+            columnas_asig,
+            codigos,
+        ))
+        posiciones.append(pos_min)
+
+    salida = AcumuladorSalida(columnas_asig, codigos)
+    asignado = np.zeros(len(df_min_pos), dtype=np.int64)
+    contadores = {"fragmentos": n_fragmentos}
+    if progreso is not None:
+        progreso.iniciar(f"4-5) Motor ({POLITICA_CONTINUO}, {n_fragmentos} fragmentos)", codigos=len(codigos))
+    codigos_por_fragmento = np.bincount(fragmentar_codigos(codigos, codigos, n_fragmentos), minlength=n_fragmentos)
+    with ProcessPoolExecutor(max_workers=min(procesos, n_fragmentos)) as pool:
+        # map conserva el orden de los fragmentos → unión determinística
+        partes = mapear(pool, _correr_fragmento, tareas, progreso, codigos_por_fragmento)
+        for pos_min, (salida_frag, asignado_frag, contadores_frag) in zip(posiciones, partes):
+            salida.extender(salida_frag)
+            asignado[pos_min] = asignado_frag
+            for clave, valor in contadores_frag.items():
+                contadores[clave] = contadores.get(clave, 0) + valor
+    return df_min_pos, columnas_asig, salida, asignado, contadores
@@ -0,0 +1,82 @@
+# =========================================================
+# PIAS — Avance y cancelación de una corrida
+# Los motores informan meses y códigos procesados en un Progreso compartido; otro hilo (la app,
+# vía piat.trabajos) lo lee para la barra de avance y puede pedir la cancelación. El motor la
+# verifica en cada avance (una vez por mes en los loops, por código en "Óptimo") y corta con
+# CorridaCancelada. Sin Progreso (None) los motores no pagan nada.
+# =========================================================
+import threading
+from typing import Optional
+
+
+class CorridaCancelada(Exception):
+    """La corrida se canceló desde afuera (Progreso.cancelar)."""
+
+
+class Progreso:
+    """Avance de una corrida: lo escribe el motor y lo leen otros hilos (enteros y str: sin lock)."""
+
+    def __init__(self):
+        self.etapa = ""
+        self.meses_total = self.meses_hechos = 0
+        self.codigos_total = self.codigos_hechos = 0
+        self._cancelado = threading.Event()
+
+    def iniciar(self, etapa: str, meses: int = 0, codigos: int = 0):
+        """Nueva etapa: fija los totales (0 = desconocido) y reinicia lo hecho."""
+        self.verificar()
+        self.etapa = etapa
+        self.meses_total, self.meses_hechos = meses, 0
+        self.codigos_total, self.codigos_hechos = codigos, 0
+
+    def avanzar(self, meses: int = 0, codigos: int = 0):
+        self.meses_hechos += meses
+        self.codigos_hechos += codigos
+        self.verificar()
+
+    def cancelar(self):
+        self._cancelado.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    def verificar(self):
+        if self._cancelado.is_set():
+            raise CorridaCancelada(f"Corrida cancelada ({self.etapa or 'antes de empezar'}).")
+
+    def fraccion(self) -> Optional[float]:
+        """Fracción hecha de la etapa (por meses si se conocen; si no, por códigos). None si no hay total."""
+        if self.meses_total:
+            return min(self.meses_hechos / self.meses_total, 1.0)
+        if self.codigos_total:
+            return min(self.codigos_hechos / self.codigos_total, 1.0)
+        return None
+
+    def a_dict(self) -> dict:
+        return {
+            "etapa": self.etapa,
+            "meses": f"{self.meses_hechos}/{self.meses_total}",
+            "codigos": f"{self.codigos_hechos}/{self.codigos_total}" if self.codigos_total else self.codigos_hechos,
+            "fraccion": self.fraccion(),
+            "cancelado": self.cancelado,
+        }
+
+
+def mapear(pool, funcion, tareas, progreso: Optional[Progreso] = None, codigos_por_tarea=None):
+    """
+    pool.map con avance: tras cada resultado (en orden) suma los códigos de esa tarea al progreso.
+    Si la corrida se cancela, descarta las tareas que aún no empezaron antes de propagar la cancelación.
+    """
+    resultados = pool.map(funcion, tareas)
+    if progreso is None:
+        return list(resultados)
+    partes = []
+    try:
+        for i, parte in enumerate(resultados):
+            partes.append(parte)
+            progreso.avanzar(codigos=int(codigos_por_tarea[i]) if codigos_por_tarea is not None else 0)
+    except CorridaCancelada:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    return partes
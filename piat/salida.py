@@ -0,0 +1,153 @@
+# =========================================================
+# PIAS — Salida de resultados
+# Hojas: Asignación Óptima, Stock Disponible, Prioridad Clientes, Mínimos de Asignación
+#
+# Formatos:
+# - xlsx:        pd.ExcelWriter + openpyxl (formato histórico; arma el libro completo en memoria)
+# - xlsx_stream: openpyxl en modo write_only, por bloques de filas (memoria acotada)
+# - zip_parquet / zip_csv: paquete .zip con una tabla por archivo, para sistemas aguas abajo
+# Con incluir_entradas=False no se re-exportan las hojas de entrada sin cambios (Stock / Prioridad).
+# =========================================================
+import io
+import zipfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+from .acumulador import asignacion_larga
+from .entradas import ARCHIVOS_TABLAS, HOJA_MINIMOS, HOJA_PRIORIDAD, HOJA_STOCK, Entradas
+from .motor import ResultadoAsignacion
+
+HOJA_ASIGNACION = "Asignación Óptima"
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_ZIP = "application/zip"
+FORMATOS_ASIGNACION = ("ancho", "largo")
+FORMATOS_SALIDA = ("xlsx", "xlsx_stream", "zip_parquet", "zip_csv")
+EXTENSION_SALIDA = {"xlsx": ".xlsx", "xlsx_stream": ".xlsx", "zip_parquet": ".zip", "zip_csv": ".zip"}
+MIME_SALIDA = {"xlsx": MIME_XLSX, "xlsx_stream": MIME_XLSX, "zip_parquet": MIME_ZIP, "zip_csv": MIME_ZIP}
+
+# Nombre de cada hoja dentro del paquete .zip
+ARCHIVOS_SALIDA = {
+    HOJA_ASIGNACION: "asignacion_optima",
+    HOJA_STOCK: ARCHIVOS_TABLAS[HOJA_STOCK],
+    HOJA_PRIORIDAD: ARCHIVOS_TABLAS[HOJA_PRIORIDAD],
+    HOJA_MINIMOS: "minimos_metricas",
+}
+FILAS_BLOQUE = 10_000
+
+
+def tabla_asignacion(resultado: ResultadoAsignacion, formato: str = "ancho") -> pd.DataFrame:
+    """
+    Hoja "Asignación Óptima":
+    - ancho: una fila por (MES, Codigo) y una columna por cliente + PUSH (formato histórico)
+    - largo: una fila por (MES, Codigo, Cliente) con cantidad > 0 (para muchos clientes en 0)
+    """
+    if formato not in FORMATOS_ASIGNACION:
+        raise ValueError(f"Formato de asignación desconocido: {formato!r}. Opciones: {', '.join(FORMATOS_ASIGNACION)}")
+    if formato == "largo":
+        return asignacion_larga(resultado.df_asig_idx)
+    return resultado.df_asig_idx.reset_index()
+
+
+def hojas_salida(resultado: ResultadoAsignacion, entradas: Entradas, formato_asignacion: str = "ancho", incluir_entradas: bool = True):
+    """
+    Tripletas (hoja, DataFrame, con_indice) en el orden del Excel; cada hoja se genera recién
+    cuando se pide. Solo "Prioridad Clientes" conserva su índice (Cliente) como en el template.
+    """
+    yield HOJA_ASIGNACION, tabla_asignacion(resultado, formato_asignacion), False
+    if incluir_entradas:
+        yield HOJA_STOCK, entradas.df_stock, False
+        yield HOJA_PRIORIDAD, entradas.df_prior, True
+    yield HOJA_MINIMOS, resultado.df_min_metrics.reset_index().rename(
+        columns={"level_0": "MES", "level_1": "Codigo", "level_2": "Cliente"}
+    ), False
+
+
+def _tabla_plana(df: pd.DataFrame, con_indice: bool) -> pd.DataFrame:
+    """Índice como columna (si corresponde) y nombres de columna como texto."""
+    if con_indice:
+        df = df.reset_index()
+    if not all(isinstance(c, str) for c in df.columns):
+        df = df.rename(columns=str)
+    return df
+
+
+# =========================
+# xlsx (pandas + openpyxl)
+# =========================
+def escribir_excel(destino, resultado: ResultadoAsignacion, entradas: Entradas, formato_asignacion: str = "ancho", incluir_entradas: bool = True):
+    """Escribe el Excel de resultados en `destino` (ruta o buffer binario)."""
+    with pd.ExcelWriter(destino, engine="openpyxl") as writer:
+        for hoja, df, con_indice in hojas_salida(resultado, entradas, formato_asignacion, incluir_entradas):
+            df.to_excel(writer, sheet_name=hoja, index=con_indice)
+
+
+# =========================
+# xlsx_stream (openpyxl write_only)
+# =========================
+def _filas_por_bloque(df: pd.DataFrame):
+    """Filas como tuplas de objetos Python (NaN → celda vacía), de a FILAS_BLOQUE por vez."""
+    for inicio in range(0, len(df), FILAS_BLOQUE):
+        bloque = df.iloc[inicio:inicio + FILAS_BLOQUE].astype(object)
+        bloque = bloque.where(bloque.notna(), None)
+        yield from bloque.itertuples(index=False, name=None)
+
+
+def escribir_excel_stream(destino, resultado: ResultadoAsignacion, entradas: Entradas, formato_asignacion: str = "ancho", incluir_entradas: bool = True):
+    """Mismo contenido que escribir_excel, escrito fila a fila en modo write_only (memoria acotada)."""
+    wb = Workbook(write_only=True)
+    for hoja, df, con_indice in hojas_salida(resultado, entradas, formato_asignacion, incluir_entradas):
+        df = _tabla_plana(df, con_indice)
+        ws = wb.create_sheet(hoja)
+        ws.append(list(df.columns))
+        for fila in _filas_por_bloque(df):
+            ws.append(fila)
+    wb.save(destino)
+
+
+# =========================
+# Paquete .zip (Parquet / CSV)
+# =========================
+def escribir_paquete(destino, resultado: ResultadoAsignacion, entradas: Entradas, formato: str = "parquet", formato_asignacion: str = "ancho", incluir_entradas: bool = True):
+    """Un archivo por hoja dentro de un .zip; cada tabla se escribe directo al zip, sin copia intermedia."""
+    if formato not in ("parquet", "csv"):
+        raise ValueError(f"Formato de paquete desconocido: {formato!r}. Opciones: parquet, csv")
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for hoja, df, con_indice in hojas_salida(resultado, entradas, formato_asignacion, incluir_entradas):
+            df = _tabla_plana(df, con_indice)
+            with zf.open(f"{ARCHIVOS_SALIDA[hoja]}.{formato}", "w") as handle:
+                if formato == "parquet":
+                    df.to_parquet(handle, index=False)
+                else:
+                    with io.TextIOWrapper(handle, encoding="utf-8", newline="") as texto:
+                        df.to_csv(texto, index=False)
+
+
+# =========================
+# Punto de entrada común
+# =========================
+def escribir_salida(destino, resultado: ResultadoAsignacion, entradas: Entradas, formato: str = "xlsx", formato_asignacion: str = "ancho", incluir_entradas: bool = True):
+    """Escribe los resultados en `destino` (ruta o buffer binario) en el formato elegido."""
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato de salida desconocido: {formato!r}. Opciones: {', '.join(FORMATOS_SALIDA)}")
+    if formato == "xlsx":
+        escribir_excel(destino, resultado, entradas, formato_asignacion, incluir_entradas)
+    elif formato == "xlsx_stream":
+        escribir_excel_stream(destino, resultado, entradas, formato_asignacion, incluir_entradas)
+    else:
+        escribir_paquete(destino, resultado, entradas, formato.split("_", 1)[1], formato_asignacion, incluir_entradas)
+
+
+def exportar_excel(resultado: ResultadoAsignacion, entradas: Entradas, formato_asignacion: str = "ancho") -> io.BytesIO:
+    """Excel de resultados en memoria (para descargas)."""
+    output = io.BytesIO()
+    escribir_excel(output, resultado, entradas, formato_asignacion)
+    output.seek(0)
+    return output
+
+
+def exportar_salida(resultado: ResultadoAsignacion, entradas: Entradas, formato: str = "xlsx", formato_asignacion: str = "ancho", incluir_entradas: bool = True) -> bytes:
+    """Resultados en memoria como bytes (una sola copia, lista para st.download_button)."""
+    output = io.BytesIO()
+    escribir_salida(output, resultado, entradas, formato, formato_asignacion, incluir_entradas)
+    return output.getvalue()
@@ -0,0 +1,157 @@
+# =========================================================
+# PIAS — Datos sintéticos para benchmarks
+# Genera tablas con el mismo formato crudo que `leer_excel` (antes de normalizar) y las
+# escribe como template Excel (mismas tres hojas y columnas que Template_Pruebas_PIAT.xlsx)
+# o como carpeta de tablas CSV/Parquet (para tamaños que no entran en una hoja de Excel):
+#   python -m piat.sintetico destino.xlsx [--codigos 1000] [--clientes 20] [--meses 12]
+#                                         [--densidad 0.2] [--sesgo-stock 1.0] [--solo-positivos]
+# =========================================================
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .entradas import ARCHIVOS_TABLAS, HOJA_MINIMOS, HOJA_PRIORIDAD, HOJA_STOCK
+
+MAX_FILAS_EXCEL = 1_048_575  # filas de datos por hoja (sin el encabezado)
+
+
+def generar_tablas(n_codigos=1_000, n_clientes=20, n_meses=12, densidad=0.2, seed=0, sesgo_stock=0.0):
+    """
+    Devuelve (df_stock, df_prior, df_min) crudos:
+    - df_stock: columnas MES, Codigo, Stock Disponible (≈60% de (mes, código) con llegada)
+    - df_prior: índice Cliente, columna Prioridad (1..n_clientes)
+    - df_min:   índice (MES, Codigo, Cliente), columna Minimo (> 0 con probabilidad `densidad`)
+    sesgo_stock > 0 concentra el stock en pocos códigos (escala tipo Zipf con exponente
+    `sesgo_stock`, media 1); con 0 todos los códigos tienen la misma distribución.
+    """
+    rng = np.random.default_rng(seed)
+    codigos = np.array([f"COD{i:06d}" for i in range(n_codigos)])
+    clientes = np.array([f"Cliente {i:03d}" for i in range(n_clientes)])
+    meses = np.arange(1, n_meses + 1)
+
+    # Stock: llegadas dispersas por (MES, Codigo)
+    mes_s, cod_s = np.meshgrid(meses, np.arange(n_codigos), indexing="ij")
+    llega = rng.random(mes_s.shape) < 0.6
+    df_stock = pd.DataFrame({
+        "MES": mes_s[llega],
+        "Codigo": codigos[cod_s[llega]],
+        "Stock Disponible": rng.integers(1, 500, size=int(llega.sum())),
+    })
+
+    # Prioridades
+    df_prior = pd.DataFrame(
+        {"Prioridad": rng.permutation(n_clientes) + 1},
+        index=pd.Index(clientes, name="Cliente"),
+    )
+
+    # Mínimos: grilla completa MES × Codigo × Cliente con densidad de filas > 0
+    n_filas = n_meses * n_codigos * n_clientes
+    mes_m = np.repeat(meses, n_codigos * n_clientes)
+    cod_m = np.tile(np.repeat(np.arange(n_codigos), n_clientes), n_meses)
+    cli_m = np.tile(np.arange(n_clientes), n_meses * n_codigos)
+    minimo = np.where(rng.random(n_filas) < densidad, rng.integers(1, 100, size=n_filas), 0)
+    df_min = pd.DataFrame(
+        {"Minimo": minimo},
+        index=pd.MultiIndex.from_arrays(
+            [mes_m, codigos[cod_m], clientes[cli_m]], names=["MES", "Codigo", "Cliente"]
+        ),
+    )
+
+    # Sesgo de stock: se sortea al final para no alterar las tablas con sesgo_stock=0
+    if sesgo_stock > 0:
+        escala = np.arange(1, n_codigos + 1, dtype=np.float64) ** -sesgo_stock
+        escala = rng.permutation(escala * n_codigos / escala.sum())
+        cod_idx = cod_s[llega]
+        df_stock["Stock Disponible"] = np.maximum(
+            1, np.rint(df_stock["Stock Disponible"].to_numpy() * escala[cod_idx])
+        ).astype(np.int64)
+    return df_stock, df_prior, df_min
+
+
+def _hojas_template(df_stock, df_prior, df_min, solo_positivos=False):
+    """Hojas planas en el orden del template: Stock, Mínimos (con o sin ceros), Prioridad."""
+    df_min = df_min[df_min["Minimo"] > 0] if solo_positivos else df_min
+    return {
+        HOJA_STOCK: df_stock,
+        HOJA_MINIMOS: df_min.reset_index(),
+        HOJA_PRIORIDAD: df_prior.reset_index(),
+    }
+
+
+def escribir_template(destino, df_stock, df_prior, df_min, solo_positivos=False):
+    """
+    Escribe un template Excel con la disposición que espera la app (ruta o buffer binario).
+    Lanza ValueError si alguna hoja supera el máximo de filas de Excel (usar escribir_tablas).
+    """
+    hojas = _hojas_template(df_stock, df_prior, df_min, solo_positivos)
+    for hoja, df in hojas.items():
+        if len(df) > MAX_FILAS_EXCEL:
+            raise ValueError(
+                f"La hoja '{hoja}' tendría {len(df):,} filas (máximo de Excel: {MAX_FILAS_EXCEL:,}). "
+                "Usar solo_positivos=True o una carpeta de tablas CSV/Parquet."
+            )
+    with pd.ExcelWriter(destino, engine="openpyxl") as writer:
+        for hoja, df in hojas.items():
+            df.to_excel(writer, sheet_name=hoja, index=False)
+
+
+def escribir_tablas(carpeta, df_stock, df_prior, df_min, formato="parquet", solo_positivos=False):
+    """Escribe las tres tablas en `carpeta` (stock_disponible.*, prioridad_clientes.*, minimos_asignacion.*)."""
+    if formato not in ("parquet", "csv"):
+        raise ValueError(f"Formato de tablas desconocido: {formato!r}. Opciones: parquet, csv")
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    for hoja, df in _hojas_template(df_stock, df_prior, df_min, solo_positivos).items():
+        ruta = carpeta / f"{ARCHIVOS_TABLAS[hoja]}.{formato}"
+        if formato == "parquet":
+            df.to_parquet(ruta, index=False)
+        else:
+            df.to_csv(ruta, index=False)
+    return carpeta
+
+
+def generar_template(destino, n_codigos=1_000, n_clientes=20, n_meses=12, densidad=0.2, seed=0, sesgo_stock=0.0, solo_positivos=False):
+    """
+    Atajo: genera las tablas y las escribe en `destino`.
+    .xlsx → template Excel; cualquier otra ruta → carpeta de tablas Parquet.
+    """
+    tablas = generar_tablas(n_codigos, n_clientes, n_meses, densidad, seed, sesgo_stock)
+    if str(destino).lower().endswith(".xlsx"):
+        escribir_template(destino, *tablas, solo_positivos=solo_positivos)
+    else:
+        escribir_tablas(destino, *tablas, solo_positivos=solo_positivos)
+    return destino
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m piat.sintetico",
+        description="Genera un template sintético (.xlsx) o una carpeta de tablas Parquet.",
+    )
+    parser.add_argument("destino", type=Path, help="Archivo .xlsx o carpeta de salida.")
+    parser.add_argument("--codigos", type=int, default=1_000)
+    parser.add_argument("--clientes", type=int, default=20)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--densidad", type=float, default=0.2, help="Probabilidad de mínimo > 0 por (MES, Codigo, Cliente).")
+    parser.add_argument("--sesgo-stock", type=float, default=0.0, help="Exponente Zipf del stock por código (0 = sin sesgo).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solo-positivos", action="store_true", help="Escribir solo los mínimos > 0.")
+    args = parser.parse_args(argv)
+
+    try:
+        generar_template(
+            args.destino, args.codigos, args.clientes, args.meses, args.densidad,
+            args.seed, args.sesgo_stock, args.solo_positivos,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {args.destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
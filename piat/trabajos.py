@@ -0,0 +1,139 @@
+# =========================================================
+# PIAS — Trabajos en segundo plano (corridas largas sin bloquear la app)
+# Una corrida se envía al GestorTrabajos como un Trabajo con id: corre en un pool de hilos
+# (el motor paralelo / Óptimo siguen usando su propio pool de procesos dentro del trabajo),
+# informa su avance en un Progreso (piat.progreso) y se puede cancelar. El gestor guarda los
+# trabajos terminados (acotados por cantidad y TTL) para que un cliente que se reconecta con
+# el id vuelva a ver el resultado sin recalcular.
+# Con `clave`, enviar dos veces la misma corrida devuelve el trabajo existente (en curso o terminado).
+# =========================================================
+import threading
+import time
+import uuid
+from concurrent import futures
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .progreso import CorridaCancelada, Progreso
+
+ESTADO_EN_COLA = "en cola"
+ESTADO_EN_CURSO = "en curso"
+ESTADO_TERMINADO = "terminado"
+ESTADO_CANCELADO = "cancelado"
+ESTADO_ERROR = "error"
+ESTADOS_FINALES = (ESTADO_TERMINADO, ESTADO_CANCELADO, ESTADO_ERROR)
+
+
+@dataclass
+class Trabajo:
+    """Una corrida enviada al gestor. `datos` guarda el contexto para re-engancharse (archivo, entradas, ...)."""
+    id: str
+    descripcion: str
+    progreso: Progreso
+    clave: Optional[tuple] = None
+    datos: dict = field(default_factory=dict)
+    estado: str = ESTADO_EN_COLA
+    resultado: Any = None
+    error: Optional[str] = None
+    creado: float = field(default_factory=time.time)
+    inicio: Optional[float] = None
+    fin: Optional[float] = None
+    futuro: Any = field(default=None, repr=False)
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in ESTADOS_FINALES
+
+    def segundos(self) -> float:
+        """Duración (hasta ahora si sigue en curso)."""
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.time()) - self.inicio
+
+
+class GestorTrabajos:
+    """Pool de hilos con registro de trabajos por id (seguro entre sesiones de la app)."""
+
+    def __init__(self, hilos: int = 1, max_terminados: int = 8, ttl_seg: float = 60 * 60):
+        self.max_terminados = max_terminados
+        self.ttl_seg = ttl_seg
+        self._pool = futures.ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="piat-trabajo")
+        self._trabajos = {}
+        self._lock = threading.Lock()
+
+    def enviar(self, funcion, *args, clave=None, descripcion: str = "", datos=None, **kwargs) -> Trabajo:
+        """
+        Encola funcion(*args, progreso=<Progreso del trabajo>, **kwargs) y devuelve el Trabajo.
+        Con `clave`, reutiliza un trabajo igual en cola, en curso o terminado (no los cancelados o con error).
+        """
+        with self._lock:
+            self._purgar()
+            if clave is not None:
+                for trabajo in self._trabajos.values():
+                    if trabajo.clave == clave and trabajo.estado not in (ESTADO_CANCELADO, ESTADO_ERROR):
+                        return trabajo
+            trabajo = Trabajo(uuid.uuid4().hex[:12], descripcion, Progreso(), clave, dict(datos or {}))
+            self._trabajos[trabajo.id] = trabajo
+            trabajo.futuro = self._pool.submit(self._correr, trabajo, funcion, args, kwargs)
+        return trabajo
+
+    def _correr(self, trabajo: Trabajo, funcion, args, kwargs):
+        trabajo.inicio = time.time()
+        trabajo.estado = ESTADO_EN_CURSO
+        resultado = error = None
+        try:
+            trabajo.progreso.verificar()  # cancelado mientras estaba en cola
+            resultado = funcion(*args, progreso=trabajo.progreso, **kwargs)
+            estado = ESTADO_TERMINADO
+        except CorridaCancelada:
+            estado = ESTADO_CANCELADO
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            estado = ESTADO_ERROR
+        trabajo.resultado, trabajo.error, trabajo.fin = resultado, error, time.time()
+        trabajo.estado = estado  # al final: quien ve un estado final ya ve resultado y fin
+
+    def obtener(self, id_trabajo) -> Optional[Trabajo]:
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def trabajos(self) -> list:
+        """Trabajos registrados, del más reciente al más antiguo."""
+        with self._lock:
+            return sorted(self._trabajos.values(), key=lambda t: t.creado, reverse=True)
+
+    def cancelar(self, id_trabajo) -> bool:
+        """Pide la cancelación: un trabajo en cola no llega a correr; uno en curso corta en su próximo avance."""
+        trabajo = self.obtener(id_trabajo)
+        if trabajo is None or trabajo.terminado:
+            return False
+        trabajo.progreso.cancelar()
+        if trabajo.futuro.cancel():
+            trabajo.fin = time.time()
+            trabajo.estado = ESTADO_CANCELADO
+        return True
+
+    def esperar(self, id_trabajo, timeout: Optional[float] = None) -> Optional[Trabajo]:
+        """Bloquea hasta que el trabajo termine (o venza `timeout`) y lo devuelve."""
+        trabajo = self.obtener(id_trabajo)
+        if trabajo is not None and trabajo.futuro is not None and not trabajo.futuro.cancelled():
+            try:
+                trabajo.futuro.result(timeout)
+            except futures.TimeoutError:
+                pass
+        return trabajo
+
+    def cerrar(self):
+        for trabajo in self.trabajos():
+            if not trabajo.terminado:
+                self.cancelar(trabajo.id)
+        self._pool.shutdown(wait=True)
+
+    def _purgar(self):
+        """Descarta terminados vencidos (TTL) y los más viejos por encima de max_terminados (con el lock tomado)."""
+        ahora = time.time()
+        terminados = sorted((t for t in self._trabajos.values() if t.terminado), key=lambda t: t.fin)
+        vencidos = [t for t in terminados if ahora - t.fin > self.ttl_seg]
+        sobrantes = terminados[: max(0, len(terminados) - self.max_terminados)]
+        for trabajo in {t.id: t for t in vencidos + sobrantes}.values():
+            del self._trabajos[trabajo.id]